@@ -1,54 +1,112 @@
 import sys
 import os
-import re
-import requests
-from bs4 import BeautifulSoup
 from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
                               QPushButton, QLabel, QFileDialog, QTextEdit, QLineEdit,
                               QListWidget, QListWidgetItem, QSplitter, QComboBox,
-                              QToolTip)
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QIcon, QPixmap  # Add QPixmap import
-
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
-import re
-
-# Add this function after the imports
-def sanitize_filename(filename):
-    """Remove/replace invalid Windows filename characters"""
-    # Windows invalid filename characters
-    invalid_chars = {'<': '', '>': '', ':': '-', '"': "'", '/': '-', 
-                    '\\': '-', '|': '-', '?': '', '*': ''}
-    
-    for char, replacement in invalid_chars.items():
-        filename = filename.replace(char, replacement)
-    return filename.strip()
-
-def extract_episode_number(filename):
-    """Extract episode number from filename using regex"""
-    episode_pattern = re.compile(
-        r'(?:[Ss]?\d*[EePp](\d{1,2}))|(\d{1,2})(?:[_\-\. ]|$)')
-    match = episode_pattern.search(filename)
-    if match:
-        episode_number = match.group(1) or match.group(2)
-        return str(int(episode_number)).zfill(2)
-    return None
+                              QToolTip, QTableView, QHeaderView, QAbstractItemView)
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, Signal
+from PySide6.QtGui import QIcon
+
+from renamer import PREFIX_PRESETS, DEFAULT_PREFIX, EpisodeGroup, group_of, plan_groups, rename_files
+from rename_plan import RenameJournal, apply_plan, undo_journal
+from preview_model import RenamePreviewModel
+from thumbnails import ThumbnailLoader
+from folder_scan import FolderScanner, iter_media_files
+from instrumentation import configure_logging
+
+# requests, bs4/lxml and the MAL client are imported where they are used rather than
+# here: together they take longer to load than Qt, and the window should not wait for
+# them. EpisodeRenamer.preload() imports them once the first frame is on screen, on the
+# GUI thread (first imports on pool threads crash some PySide6 releases), and leaves the
+# slow part, building the title index, to TitleIndexWorker.
+
+class TitleIndexWorker(QRunnable):
+    """Build the local title index (cached metadata plus the title dump) on the thread pool"""
+    def __init__(self, build_index):
+        super().__init__()
+        self.build_index = build_index  # mal_client.get_title_index, imported on the GUI thread
+
+    def run(self):
+        self.build_index()
+
+class SearchSignals(QObject):
+    finished = Signal(int, object)  # (generation, [title, anime_id] pairs)
+    failed = Signal(int, str)
+
+class SearchWorker(QRunnable):
+    """Run a MAL title search on the thread pool, tagged with the query generation"""
+    def __init__(self, generation, title, match_folder=False):
+        super().__init__()
+        self.generation = generation
+        self.title = title
+        self.match_folder = match_folder
+        self.signals = SearchSignals()
+
+    def run(self):
+        import requests
+        import mal_client
+        try:
+            # Both paths use the title index; while TitleIndexWorker is still building it, they wait for it
+            if self.match_folder:
+                # Folder names go through the local title index first and are ranked by similarity
+                results = mal_client.find_anime(self.title)
+            else:
+                results = mal_client.search_anime(self.title)
+        except requests.RequestException as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation, results)
+
+class EpisodeSignals(QObject):
+    page = Signal(int, object)  # (generation, {episode_number: title} for one page)
+    finished = Signal(int)
+    failed = Signal(int, str)
+
+class EpisodeWorker(QRunnable):
+    """Fetch every page of an episode list on the thread pool, emitting each page as it arrives"""
+    def __init__(self, generation, anime_id):
+        super().__init__()
+        self.generation = generation
+        self.anime_id = anime_id
+        self.signals = EpisodeSignals()
+
+    def run(self):
+        import requests
+        import mal_client
+        try:
+            for page in mal_client.iter_episode_pages(self.anime_id):
+                self.signals.page.emit(self.generation, page)
+        except requests.RequestException as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation)
 
 class EpisodeRenamer(QWidget):
     def __init__(self):
         super().__init__()
-        self.prefix_presets = {
-            "Episode # - ": "Episode {ep_number} - {ep_title}",
-            "Ep# - ": "Ep{ep_number} - {ep_title}",
-            "Ep# - ": "Ep{ep_number} - {ep_title}",
-            "E# - ": "E{ep_number} - {ep_title}",
-            "# - ": "{ep_number} - {ep_title}"
-
-        }
-        self.current_prefix = "Episode # - "  # Default prefix
+        self.prefix_presets = PREFIX_PRESETS
+        self.current_prefix = DEFAULT_PREFIX
+
+        # Title search runs off the UI thread; only the latest query may update the dropdown
+        self.search_pool = QThreadPool(self)
+        self.search_generation = 0
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(400)  # Wait for typing to pause before searching
+        self.search_timer.timeout.connect(self.start_title_search)
+        self.episode_generation = 0
+
+        # Covers load in the background; the loader keeps recently shown ones in memory
+        self.thumbnail_loader = ThumbnailLoader(self)
+        self.thumbnail_loader.ready.connect(self.on_thumbnail_ready)
+        self.thumbnail_loader.failed.connect(self.on_thumbnail_failed)
+
+        # Re-listing a folder is skipped while its mtime says nothing was added, removed or renamed
+        self.folder_scanner = FolderScanner()
+
+        self.preload_scheduled = False
+        self.preloaded = False
+
         self.initUI()
 
     def initUI(self):
@@ -57,7 +115,17 @@ class EpisodeRenamer(QWidget):
 
         # Initialize list widgets first
         self.episode_list = QListWidget(self)
-        self.file_list = QListWidget(self)
+        self.preview_model = RenamePreviewModel(self)
+        self.file_list = QTableView(self)
+        self.file_list.setModel(self.preview_model)
+        self.file_list.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.file_list.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.file_list.setShowGrid(False)
+        self.file_list.setWordWrap(False)
+        self.file_list.verticalHeader().setVisible(False)
+        self.file_list.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # Uniform rows keep huge folders fast
+        self.file_list.horizontalHeader().setStretchLastSection(True)
+        self.file_list.horizontalHeader().setDefaultSectionSize(260)
 
         main_layout = QVBoxLayout()
 
@@ -86,6 +154,7 @@ class EpisodeRenamer(QWidget):
         
         self.anime_results_dropdown = QComboBox(self)
         self.anime_results_dropdown.setVisible(False)
+        self.anime_results_dropdown.currentIndexChanged.connect(self.on_anime_selected)
         
         self.scrape_button = QPushButton("Fetch Episode Titles", self)
         self.scrape_button.clicked.connect(self.scrape_episodes)
@@ -143,7 +212,7 @@ class EpisodeRenamer(QWidget):
         # Right side - Files in folder
         right_container = QWidget()
         right_layout = QVBoxLayout(right_container)
-        right_layout.addWidget(QLabel("Files in Folder"))
+        right_layout.addWidget(QLabel("Files in Folder (rename preview)"))
         right_layout.addWidget(self.file_list)
         splitter.addWidget(right_container)
 
@@ -168,6 +237,12 @@ class EpisodeRenamer(QWidget):
         self.rename_button.setEnabled(False)
         bottom_layout.addWidget(self.rename_button)
 
+        # Undo the last batch of renames from its journal
+        self.undo_button = QPushButton("Undo Last Rename", self)
+        self.undo_button.clicked.connect(self.undo_last_rename)
+        self.undo_button.setEnabled(False)
+        bottom_layout.addWidget(self.undo_button)
+
         main_layout.addLayout(bottom_layout)
 
         # Status area at bottom
@@ -178,6 +253,20 @@ class EpisodeRenamer(QWidget):
 
         self.setLayout(main_layout)
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.preload_scheduled:
+            self.preload_scheduled = True
+            QTimer.singleShot(0, self.preload)  # Runs once the first frame has been flushed
+
+    def preload(self):
+        """Import the networking and parsing modules and start building the title index in the background"""
+        if self.preloaded:
+            return
+        self.preloaded = True
+        import mal_client  # Module import only; TitleIndexWorker does the slow part
+        self.search_pool.start(TitleIndexWorker(mal_client.get_title_index))
+
     def select_folder(self):
         folder_path = QFileDialog.getExistingDirectory(self, "Select Folder")
         if folder_path:
@@ -188,120 +277,29 @@ class EpisodeRenamer(QWidget):
             folder_name = os.path.basename(folder_path)
             self.anime_title_input.setText(folder_name)
             
-            # Auto-select the first valid anime in the dropdown
-            if self.anime_results_dropdown.count() > 1:
-                self.anime_results_dropdown.setCurrentIndex(1)  # Auto-select the second entry
-                self.display_anime_thumbnail()
+            # No need to wait for typing to settle; the results handler auto-selects the best match
+            self.search_timer.stop()
+            self.start_title_search(match_folder=True)
 
     def display_anime_thumbnail(self):
-        """Fetch and display the thumbnail of the selected anime"""
+        """Show the thumbnail of the selected anime, loading it in the background if needed"""
         selected_id = self.anime_results_dropdown.currentData()
         if not selected_id:
             return
 
-        # Find the selected anime's image URL
-        search_url = f"https://myanimelist.net/anime/{selected_id}"
-        try:
-            response = requests.get(search_url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Find the thumbnail image
-            img_element = soup.select_one("img.ac")
-            if img_element and "data-src" in img_element.attrs:
-                img_url = img_element["data-src"]
-            elif img_element and "src" in img_element.attrs:
-                img_url = img_element["src"]
-            else:
-                img_url = None
-
-            if img_url:
-                # Fetch and display the image
-                img_response = requests.get(img_url)
-                img_response.raise_for_status()
-                pixmap = QPixmap()
-                pixmap.loadFromData(img_response.content)
-                scaled_pixmap = pixmap.scaled(100, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation)  # Smaller size
-                
-                # Update the QLabel below the "Select Folder" button
-                self.anime_thumbnail_label.setPixmap(scaled_pixmap)
-        except requests.RequestException as e:
-            self.result_area.setText(f"Error fetching thumbnail: {str(e)}")
+        if self.thumbnail_loader.cached(selected_id) is None:
+            self.anime_thumbnail_label.clear()  # Don't leave the previous anime's cover up while loading
+        self.thumbnail_loader.request(selected_id)
 
-    def search_mal(self, anime_title):
-        """Search MyAnimeList and return the anime ID"""
-        import time
-        
-        search_url = f"https://myanimelist.net/search/all?q={anime_title.replace(' ', '%20')}&cat=anime"
-        try:
-            time.sleep(1)  # Add a small delay to avoid rate limiting
-            response = requests.get(search_url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Find first search result
-            result = soup.find("a", class_="hoverinfo_trigger")
-            if result and "href" in result.attrs:
-                anime_url = result["href"]
-                anime_id = anime_url.split("/")[-2]  # Extract anime ID
-                return anime_id
-            return None
-        except requests.RequestException as e:
-            self.result_area.setText(f"Error searching MAL: {str(e)}")
-            return None
+    def on_thumbnail_ready(self, anime_id, pixmap):
+        # Prefetched covers and superseded selections arrive here too; only show the current one
+        if anime_id == self.anime_results_dropdown.currentData():
+            # Update the QLabel below the "Select Folder" button
+            self.anime_thumbnail_label.setPixmap(pixmap)
 
-    def fetch_episode_titles(self, anime_id):
-        """Scrape MyAnimeList for episode titles"""
-        anime_details_url = f"https://myanimelist.net/anime/{anime_id}"
-        try:
-            # Get anime details page
-            response = requests.get(anime_details_url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Get formatted title
-            title_element = soup.select_one("h1.title-name")
-            formatted_title = title_element.text.strip().replace(" ", "_") if title_element else ""
-
-            # Get episodes page
-            episodes_url = f"https://myanimelist.net/anime/{anime_id}/{formatted_title}/episode"
-            response = requests.get(episodes_url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            episode_titles = {}
-            # Updated selector to match MAL's current structure
-            episodes = soup.select("table.episode_list tbody tr")
-
-            # Debug info
-            print(f"URL being accessed: {episodes_url}")
-            print(f"Number of episodes found: {len(episodes)}")
-
-            for episode in episodes:
-                try:
-                    # Get episode number and ensure it's two digits
-                    ep_number = episode.select_one("td.episode-number").text.strip().rstrip('.')
-                    ep_number = str(int(ep_number)).zfill(2)  # Convert to consistent 2-digit format
-                    
-                    # Get episode title
-                    ep_title = episode.select_one("td.episode-title a.fl-l.fw-b").text.strip()
-                    
-                    if ep_number and ep_title:
-                        print(f"Debug - Found episode: {ep_number} - {ep_title}")  # Debug print
-                        episode_titles[ep_number] = ep_title
-                except (AttributeError, IndexError) as e:
-                    print(f"Error parsing episode: {str(e)}")
-                    continue
-
-            if not episode_titles:
-                self.result_area.setText("Could not parse episode titles. The page structure might have changed.")
-                print("HTML content:", soup.prettify())  # Debug print
-                return {}
-
-            return episode_titles
-        except requests.RequestException as e:
-            self.result_area.setText(f"Error fetching episodes: {str(e)}")
-            return {}
+    def on_thumbnail_failed(self, anime_id, error):
+        if anime_id == self.anime_results_dropdown.currentData():
+            self.result_area.setText(f"Error fetching thumbnail: {error}")
 
     def scrape_episodes(self):
         """Fetch episode titles for selected anime"""
@@ -311,58 +309,68 @@ class EpisodeRenamer(QWidget):
             return
 
         self.result_area.setText("Fetching episodes...")
-        episode_titles = self.fetch_episode_titles(selected_id)
+        self.episode_titles = {}
+        self.update_episode_list()
+        self.update_preview()
+        self.rename_button.setEnabled(False)
+        self.match_button.setEnabled(False)
 
-        if episode_titles:
+        # Long-running series span several pages; they stream into the list as they arrive
+        self.episode_generation += 1
+        worker = EpisodeWorker(self.episode_generation, selected_id)
+        worker.signals.page.connect(self.on_episode_page)
+        worker.signals.finished.connect(self.on_episodes_fetched)
+        worker.signals.failed.connect(self.on_episodes_failed)
+        self.search_pool.start(worker)
+
+    def on_episode_page(self, generation, page):
+        """Merge one page of episode titles into the list"""
+        if generation != self.episode_generation:
+            return
+        import mal_client  # Already loaded by the worker that fetched the page
+        self.episode_titles = mal_client.sort_episodes({**self.episode_titles, **page})
+        self.update_episode_list()
+        self.update_preview()
+        self.result_area.setText(f"Fetching episodes... {len(self.episode_titles)} so far")
+
+    def on_episodes_fetched(self, generation):
+        if generation != self.episode_generation:
+            return
+        if self.episode_titles:
             self.result_area.setText("\n".join(f"Episode {ep}: {title}" 
-                                             for ep, title in episode_titles.items()))
-            self.episode_titles = episode_titles
-            self.update_episode_list()
+                                             for ep, title in self.episode_titles.items()))
             self.rename_button.setEnabled(True)
             self.match_button.setEnabled(True)
         else:
             self.result_area.setText("No episode titles found!")
-            self.rename_button.setEnabled(False)
+
+    def on_episodes_failed(self, generation, error):
+        if generation == self.episode_generation:
+            self.result_area.setText(f"Error fetching episodes: {error}")
 
     def rename_files(self, folder_path, episode_titles):
         """Rename episode files based on scraped titles"""
-        episode_files = os.listdir(folder_path)
-        renamed_files = []
-        
-        print("Debug - Available episode titles:", episode_titles.keys())
+        journal = RenameJournal()
+        renamed_files = rename_files(folder_path, episode_titles,
+                                     self.prefix_presets[self.current_prefix], journal)
+        self.remember_journal(journal)
+        return renamed_files
 
-        for file in episode_files:
-            print(f"\nDebug - Processing file: {file}")
-            ep_number = extract_episode_number(file)
-            print(f"Debug - Extracted episode number: {ep_number}")
-            
-            if ep_number and ep_number in episode_titles:
-                print(f"Debug - Match found for episode {ep_number}")
-                old_path = os.path.normpath(os.path.join(folder_path, file))
-                
-                safe_title = sanitize_filename(episode_titles[ep_number])
-                
-                format_template = self.prefix_presets[self.current_prefix]
-                new_filename = format_template.format(
-                    ep_number=ep_number,
-                    ep_title=safe_title
-                ) + os.path.splitext(file)[1]
-                
-                new_path = os.path.normpath(os.path.join(folder_path, new_filename))
-
-                try:
-                    os.rename(old_path, new_path)
-                    renamed_files.append(f"{file} → {new_filename}")
-                    print(f"Debug - Successfully renamed to: {new_filename}")
-                except OSError as e:
-                    renamed_files.append(f"Error renaming {file}: {str(e)}")
-                    print(f"Debug - Error: {str(e)}")
-                    print(f"Debug - Old path: {old_path}")
-                    print(f"Debug - New path: {new_path}")
-            else:
-                print(f"Debug - No match found for episode {ep_number}")
+    def remember_journal(self, journal):
+        """Make a batch undoable if it renamed anything"""
+        if os.path.exists(journal.path):
+            self.last_journal = journal.path
+            self.undo_button.setEnabled(True)
 
-        return renamed_files
+    def undo_last_rename(self):
+        """Revert the last batch of renames"""
+        if not hasattr(self, 'last_journal'):
+            return
+        results = undo_journal(self.last_journal)
+        del self.last_journal
+        self.undo_button.setEnabled(False)
+        self.result_area.setText("Undone:\n" + "\n".join(results))
+        self.update_file_list(renamed=True)
 
     def rename_episodes(self):
         """Handle the episode renaming process"""
@@ -380,54 +388,61 @@ class EpisodeRenamer(QWidget):
         if renamed_files:
             result_text = "Renamed files:\n" + "\n".join(renamed_files)
             self.result_area.setText(result_text)
-            self.update_file_list()
+            self.update_file_list(renamed=True)
         else:
             self.result_area.setText("No matching files found for renaming!")
 
     def match_selected(self):
         """Handle manual matching of selected episode and file"""
         episode_item = self.episode_list.currentItem()
-        file_item = self.file_list.currentItem()
+        file_name = self.preview_model.file_at(self.file_list.currentIndex().row())
         
-        if not episode_item or not file_item:
+        if not episode_item or file_name is None:
             self.result_area.setText("Please select both an episode and a file to match")
             return
 
-        # Get episode number and title
-        ep_number = episode_item.data(Qt.UserRole)  # Stored during scraping
-        ep_title = sanitize_filename(self.episode_titles[ep_number])
-        
-        # Update the filename generation:
-        format_template = self.prefix_presets[self.current_prefix]
-        new_filename = format_template.format(
-            ep_number=ep_number,
-            ep_title=ep_title
-        ) + os.path.splitext(file_item.text())[1]
-        
-        # Get file path and perform rename
-        old_path = os.path.join(self.selected_folder, file_item.text())
-        new_path = os.path.join(self.selected_folder, new_filename)
-
-        try:
-            os.rename(old_path, new_path)
-            self.result_area.setText(f"Renamed: {file_item.text()} → {new_filename}")
+        # Get episode number (stored during scraping); the file's subtitles and sidecars move with it
+        ep_number = episode_item.data(Qt.UserRole)
+        files = list(iter_media_files(self.selected_folder))
+        group = group_of(file_name, files) or EpisodeGroup(None, file_name, [])
+        group = group._replace(episode=ep_number)
+
+        # Check for existing files with the new names, then perform rename
+        plan = plan_groups(self.selected_folder, [group], self.episode_titles,
+                           self.prefix_presets[self.current_prefix], existing=files)
+        journal = RenameJournal()
+        results = apply_plan(plan, journal)
+        self.remember_journal(journal)
+        if plan.moves:
+            self.result_area.setText("Renamed: " + "\n".join(results))
             # Update the file list
-            self.update_file_list()
-        except OSError as e:
-            self.result_area.setText(f"Error renaming file: {str(e)}")
+            self.update_file_list(renamed=True)
+        elif plan.conflicts:
+            self.result_area.setText("Error renaming file: " + "\n".join(results))
+        else:
+            self.result_area.setText(f"{file_name} already has that name")
 
-    def update_file_list(self):
-        """Update the list of files in the selected folder"""
-        self.file_list.clear()
+    def update_file_list(self, renamed=False):
+        """Update the list of video/subtitle files in the selected folder, touching only rows that changed"""
         if hasattr(self, 'selected_folder'):
-            files = sorted(os.listdir(self.selected_folder))
-            self.file_list.addItems(files)
+            if renamed:
+                # Our own renames may land within the mtime granularity of FAT/SMB shares
+                self.folder_scanner.forget(self.selected_folder)
+            state, previous = self.folder_scanner.scan(self.selected_folder)
+            if state is previous and self.preview_model.folder_path == self.selected_folder:
+                return  # Nothing in the folder has changed since it was last listed
+            self.preview_model.set_files(self.selected_folder, state.files)
+
+    def update_preview(self):
+        """Recompute proposed names after the episode titles or filename format change"""
+        self.preview_model.set_mapping(getattr(self, 'episode_titles', {}),
+                                       self.prefix_presets[self.current_prefix])
 
     def update_episode_list(self):
         """Update the list of episode titles"""
         self.episode_list.clear()
         if hasattr(self, 'episode_titles'):
-            for ep_num, title in sorted(self.episode_titles.items()):
+            for ep_num, title in sorted(self.episode_titles.items(), key=lambda item: int(item[0])):
                 item = QListWidgetItem(f"Episode {ep_num}: {title}")
                 item.setData(Qt.UserRole, ep_num)
                 self.episode_list.addItem(item)
@@ -436,52 +451,55 @@ class EpisodeRenamer(QWidget):
         """Handle anime title input changes"""
         title = self.anime_title_input.text().strip()
         if len(title) >= 3:  # Only search if 3 or more characters
-            self.search_anime_titles(title)
+            self.search_timer.start()  # Restarting the timer debounces keystrokes
         else:
+            self.search_timer.stop()
+            self.search_generation += 1  # Drop any search still in flight
             self.anime_results_dropdown.clear()
             self.anime_results_dropdown.setVisible(False)
             self.scrape_button.setEnabled(False)
 
-    def search_anime_titles(self, title):
-        """Search MAL for anime titles and populate dropdown"""
-        search_url = f"https://myanimelist.net/search/all?q={title.replace(' ', '%20')}&cat=anime"
-        try:
-            response = requests.get(search_url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Find all search results
-            results = soup.find_all("a", class_="hoverinfo_trigger")
-            
-            self.anime_results_dropdown.clear()
-            
-            # Populate the dropdown with results
-            valid_entries = []
-            for result in results:
-                if "href" in result.attrs and "/anime/" in result["href"]:
-                    anime_url = result["href"]
-                    anime_id = anime_url.split("/")[-2]
-                    anime_title = result.text.strip()
-                    
-                    # Add the entry to the dropdown
-                    self.anime_results_dropdown.addItem(anime_title, userData=anime_id)
-                    valid_entries.append(anime_id)
-            
-            # Auto-select the second entry if available
-            if len(valid_entries) > 1:
-                self.anime_results_dropdown.setCurrentIndex(1)  # Default to the second entry
-                self.scrape_button.setEnabled(True)
-            else:
-                self.scrape_button.setEnabled(False)
-            
-            self.anime_results_dropdown.setVisible(True)
-            self.anime_results_dropdown.currentIndexChanged.connect(self.on_anime_selected)  # Ensure signal is connected
-        except requests.RequestException as e:
-            self.result_area.setText(f"Error searching MAL: {str(e)}")
+    def start_title_search(self, match_folder=False):
+        """Search MAL for the current title in the background"""
+        title = self.anime_title_input.text().strip()
+        if len(title) < 3:
+            return
+
+        self.preload()  # No-op once started; episode and thumbnail workers only start after a search
+        self.search_generation += 1
+        worker = SearchWorker(self.search_generation, title, match_folder)
+        worker.signals.finished.connect(self.search_anime_titles)
+        worker.signals.failed.connect(self.on_search_failed)
+        self.search_pool.start(worker)
+
+    def search_anime_titles(self, generation, results):
+        """Populate dropdown with MAL search results"""
+        if generation != self.search_generation:
+            return  # A newer query has been issued since this one started
+
+        self.anime_results_dropdown.clear()
+        
+        # Populate the dropdown with results
+        for anime_title, anime_id in results:
+            self.anime_results_dropdown.addItem(anime_title, userData=anime_id)
+        
+        # Results come best match first
+        if results:
+            self.anime_results_dropdown.setCurrentIndex(0)
+            self.scrape_button.setEnabled(True)
+            self.thumbnail_loader.prefetch([anime_id for anime_title, anime_id in results])
+        else:
+            self.scrape_button.setEnabled(False)
+        
+        self.anime_results_dropdown.setVisible(True)
+
+    def on_search_failed(self, generation, error):
+        if generation == self.search_generation:
+            self.result_area.setText(f"Error searching MAL: {error}")
 
     def on_anime_selected(self, index):
         """Handle anime selection from dropdown"""
-        if index > 0:  # Skip invalid selections
+        if index >= 0:  # -1 while the dropdown is empty
             self.scrape_button.setEnabled(True)
             self.display_anime_thumbnail()  # Refresh the thumbnail when selection changes
         else:
@@ -491,10 +509,12 @@ class EpisodeRenamer(QWidget):
     def on_prefix_changed(self, new_prefix):
         """Handle prefix format selection"""
         self.current_prefix = new_prefix
+        self.update_preview()
 
 # Run the application
 if __name__ == "__main__":
+    configure_logging()
     app = QApplication(sys.argv)
     window = EpisodeRenamer()
-    window.show()
+    window.show()  # The first paint schedules preload()
     sys.exit(app.exec())
\ No newline at end of file
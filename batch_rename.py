@@ -0,0 +1,130 @@
+"""Headless batch renamer: treats every subfolder of a library root as one series.
+
+    python batch_rename.py /media/anime --workers 4 --format "Ep# - "
+    python batch_rename.py /media/anime --watch
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import mal_client
+import mal_http
+import series_graph
+from folder_scan import iter_media_files
+from instrumentation import DEFAULT_LEVEL, configure_logging, span, log_metrics, format_metrics
+from renamer import PREFIX_PRESETS, DEFAULT_PREFIX, rename_files
+from rename_plan import RenameJournal, undo_journal
+from library_watcher import LibraryWatcher, SETTLE_SECONDS
+
+
+def find_series_folders(root):
+    """Return every immediate subfolder of root, sorted by name"""
+    with os.scandir(root) as entries:
+        return sorted(entry.path for entry in entries if entry.is_dir())
+
+
+def process_series(folder_path, format_template, journal):
+    """Resolve the series for one folder, fetch its titles and rename its files"""
+    # Auto-detect anime title from folder name, same as the GUI's Select Folder
+    folder_name = os.path.basename(folder_path)
+    with span("series", series=folder_name):
+        try:
+            with span("resolve"):
+                anime_id = mal_client.resolve_anime_id(folder_name)
+            if anime_id is None:
+                return folder_path, None, ["No MAL search results"]
+
+            with span("episodes"):
+                # Other seasons are looked up too if the files use absolute or S02E03 numbering
+                episode_titles, episode_of = series_graph.folder_titles(anime_id, list(iter_media_files(folder_path)))
+            if not episode_titles:
+                return folder_path, anime_id, ["No episode titles found"]
+            return folder_path, anime_id, rename_files(folder_path, episode_titles, format_template, journal, episode_of)
+        except requests.RequestException as e:
+            return folder_path, None, [f"Error contacting MAL: {str(e)}"]
+        except OSError as e:
+            return folder_path, None, [f"File system error: {str(e)}"]  # Folder gone or unreadable, or a failed rename
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rename anime episodes for every series folder under a root directory.")
+    parser.add_argument("root", nargs="?", help="Library root; each subfolder is treated as one series")
+    parser.add_argument("--workers", type=int, default=mal_http.MAX_CONCURRENCY,
+                        help="Number of series processed in parallel (default: %(default)s); "
+                             "requests to MAL are rate limited regardless")
+    parser.add_argument("--format", default=DEFAULT_PREFIX,
+                        help="Filename preset (%s) or a template using {ep_number} and {ep_title}"
+                             % ", ".join(repr(key) for key in PREFIX_PRESETS))
+    parser.add_argument("--undo", metavar="JOURNAL", help="Revert a previous run using the journal it printed")
+    parser.add_argument("--watch", action="store_true",
+                        help="Instead of renaming what is there now, keep running and rename new episodes as they arrive")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="With --watch, seconds a new file must stop changing before it is renamed (default: %(default)s)")
+    parser.add_argument("--log-level", default=DEFAULT_LEVEL, type=str.upper,
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Console log level (default: %(default)s)")
+    parser.add_argument("--log-json", metavar="FILE",
+                        help="Also write every log record and timing span to FILE as JSON lines")
+    parser.add_argument("--timings", action="store_true", help="Print time spent per stage at the end of the run")
+    parser.add_argument("--mal-url", metavar="URL",
+                        help="Fetch from this address instead of myanimelist.net, e.g. a fixtures/mal_standin.py server")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level, args.log_json)
+
+    if args.mal_url:
+        mal_client.MAL_BASE_URL = args.mal_url.rstrip("/")
+
+    if args.undo:
+        for message in undo_journal(args.undo):
+            print(message)
+        return 0
+
+    format_template = PREFIX_PRESETS.get(args.format, args.format)
+    if "{ep_number}" not in format_template:
+        parser.error("--format must be a preset or contain {ep_number}")
+    try:
+        format_template.format(ep_number="01", ep_title="Title")
+    except (KeyError, ValueError, IndexError) as e:
+        parser.error(f"--format is not a valid template ({e!r}); only {{ep_number}} and {{ep_title}} can be used")
+    if not args.root:
+        parser.error("root is required unless --undo is given")
+    if not os.path.isdir(args.root):
+        parser.error(f"{args.root} is not a directory")
+
+    journal = RenameJournal()
+    if args.watch:
+        watcher = LibraryWatcher(args.root, format_template, journal, settle_seconds=args.settle)
+        print(f"Watching {args.root} for new episodes (Ctrl+C to stop)")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        if os.path.exists(journal.path):
+            print(f"Undo with: python batch_rename.py --undo \"{journal.path}\"")
+        return 0
+
+    folders = find_series_folders(args.root)
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for folder_path, anime_id, messages in pool.map(
+                lambda folder: process_series(folder, format_template, journal), folders):
+            print(f"{os.path.basename(folder_path)} (MAL {anime_id or '?'}):")
+            for message in messages:
+                print(f"  {message}")
+            if anime_id is None:
+                failures += 1
+
+    print(f"Processed {len(folders)} series, {failures} unresolved")
+    if args.log_json:
+        log_metrics()
+    if args.timings:
+        print(format_metrics())
+    if os.path.exists(journal.path):
+        print(f"Undo with: python batch_rename.py --undo \"{journal.path}\"")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Accuracy and throughput of episode-number extraction over real release filenames.
+
+    python benchmarks/bench_episode_number.py [--repeat 200]
+
+Compares the rule engine in episode_number.py with the single regex it replaced.
+The corpus is benchmarks/release_filenames.tsv: one filename and the expected
+episode per line, expected left empty for files without one (OPs, soundtracks).
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from episode_number import parse_episode
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "release_filenames.tsv")
+
+LEGACY_PATTERN = re.compile(r'(?:[Ss]?\d*[EePp](\d{1,2}))|(\d{1,2})(?:[_\-\. ]|$)')
+
+
+def legacy_extract(filename):
+    match = LEGACY_PATTERN.search(filename)
+    if match:
+        return int(match.group(1) or match.group(2))
+    return None
+
+
+def engine_extract(filename):
+    match = parse_episode(filename)
+    return match.episode if match else None
+
+
+def load_corpus():
+    corpus = []
+    with open(CORPUS, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            filename, expected = line.rstrip("\n").split("\t")
+            corpus.append((filename, int(expected) if expected else None))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the corpus for timing (default: 200)")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    names = [filename for filename, _ in corpus]
+    print(f"{len(corpus)} filenames")
+    print(f"{'extractor':<10}{'accuracy':>10}{'names/s':>12}")
+    for label, extract in (("legacy", legacy_extract), ("engine", engine_extract)):
+        misses = [(filename, expected, extract(filename)) for filename, expected in corpus
+                  if extract(filename) != expected]
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for filename in names:
+                extract(filename)
+        rate = len(names) * args.repeat / (time.perf_counter() - start)
+
+        accuracy = 1 - len(misses) / len(corpus)
+        print(f"{label:<10}{accuracy:>10.1%}{rate:>12,.0f}")
+        if args.show_misses:
+            for filename, expected, got in misses:
+                print(f"    {filename!r}: expected {expected}, got {got}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Parse time and memory per MAL page type, for each parsing backend.
+
+    python benchmarks/bench_parse.py [--iterations 20] [--pad-kb 300]
+
+The fixture pages in fixtures/mal keep MAL's markup but little of its bulk, so
+each page is padded with --pad-kb of sidebar-like filler to match the weight of
+a live page. "legacy" is the previous approach (full html.parser tree, then CSS
+selectors) for comparison.
+
+Memory is the growth in peak resident set size while parsing the page once,
+measured in a fresh interpreter per page type and backend. Unlike a
+tracemalloc peak, it includes lxml's tree, which lives in libxml2's own heap.
+It is only reported on Unix.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# resource is Unix-only; without it the memory column is left empty
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:
+    HAVE_RESOURCE = False
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup
+
+import mal_parse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fixtures", "mal")
+
+PAGES = {
+    "search": ("search_kusuriya_no_hitorigoto.html", mal_parse.parse_search_results),
+    "details": ("anime_54492.html", mal_parse.parse_anime_details),
+    "episodes": ("anime_21_episode.html", mal_parse.parse_episode_page),
+}
+
+
+def legacy_parse(html):
+    """Full-tree parse plus every selector the old code ran, whatever the page type"""
+    soup = BeautifulSoup(html, "html.parser")
+    soup.find_all("a", class_="hoverinfo_trigger")
+    soup.select_one("h1.title-name")
+    soup.select_one("img.ac")
+    for row in soup.select("table.episode_list tbody tr"):
+        row.select_one("td.episode-number")
+        row.select_one("td.episode-title a.fl-l.fw-b")
+
+
+def load_page(filename, pad_kb):
+    with open(os.path.join(FIXTURES, filename), encoding="utf-8") as f:
+        html = f.read()
+    block = '<div class="sidebar-item"><a href="https://myanimelist.net/anime/1/x">Related</a><span class="fn-grey4">filler text</span></div>\n'
+    filler = '<div id="sidebar">' + block * (pad_kb * 1024 // len(block)) + '</div>'
+    return html.replace("</body>", filler + "</body>")
+
+
+def measure(parse, html, iterations):
+    """Return milliseconds per page for parse(html)"""
+    parse(html)  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(html)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def max_rss_kb():
+    """Return this process's peak resident set size in KB.
+
+    On Linux ru_maxrss keeps the parent's peak across exec, which would hide a
+    probe's own growth, so VmHWM (reset at exec) is read from /proc instead.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == "darwin" else peak  # Bytes on macOS, KB elsewhere
+
+
+def rss_probe(page_type, backend, pad_kb):
+    """Print how much parsing one page once raises this process's peak RSS, in KB (run in a fresh interpreter)"""
+    filename, parse = PAGES[page_type]
+    html = load_page(filename, pad_kb)
+    if backend == "legacy":
+        parse = legacy_parse
+    else:
+        mal_parse.BACKEND = backend
+    before = max_rss_kb()
+    parse(html)
+    print(max_rss_kb() - before)
+
+
+def peak_rss(page_type, backend, pad_kb):
+    """Return the peak RSS growth in KB of parsing one page with backend, or None without the resource module"""
+    if not HAVE_RESOURCE:
+        return None
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--rss-probe", page_type, backend,
+                             "--pad-kb", str(pad_kb)], capture_output=True, text=True, check=True).stdout
+    return float(output)
+
+
+def format_kb(kb):
+    return f"{kb:>10.0f}" if kb is not None else f"{'n/a':>10}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--pad-kb", type=int, default=300, help="Filler added to each page (default: 300)")
+    parser.add_argument("--rss-probe", nargs=2, metavar=("PAGE", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.rss_probe:
+        rss_probe(*args.rss_probe, args.pad_kb)
+        return
+
+    backends = ["lxml", "soup"] if mal_parse.HAVE_LXML else ["soup"]
+    print(f"{'page':<10}{'size KB':>9}  {'backend':<8}{'ms/page':>10}{'RSS KB':>10}")
+    for page_type, (filename, parse) in PAGES.items():
+        html = load_page(filename, args.pad_kb)
+        size = len(html.encode("utf-8")) / 1024
+        for backend in backends:
+            mal_parse.BACKEND = backend
+            ms = measure(parse, html, args.iterations)
+            print(f"{page_type:<10}{size:>9.0f}  {backend:<8}{ms:>10.2f}{format_kb(peak_rss(page_type, backend, args.pad_kb))}")
+        ms = measure(legacy_parse, html, args.iterations)
+        print(f"{page_type:<10}{size:>9.0f}  {'legacy':<8}{ms:>10.2f}{format_kb(peak_rss(page_type, 'legacy', args.pad_kb))}")
+
+
+if __name__ == "__main__":
+    main()
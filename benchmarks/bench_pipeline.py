@@ -0,0 +1,218 @@
+"""Per-stage time and memory of the rename pipeline over a synthetic library.
+
+    python benchmarks/bench_pipeline.py [--files 40000] [--episodes 25] [--repeat 3]
+        [--save-baseline] [--tolerance 0.3]
+
+Generates a throwaway library of series folders filled with release filenames
+in the styles seen in benchmarks/release_filenames.tsv, then times each stage
+the batch renamer goes through: streaming each folder's media files, walking
+the library again with nothing changed (as the GUI and watcher do), extracting
+episode numbers, sanitizing titles, planning, renaming on disk, and parsing MAL
+pages (fixtures/mal, padded like bench_parse.py). Every stage runs --repeat times
+for timing, keeping the fastest run to filter out disk and scheduler noise, and
+once more on a fresh copy under tracemalloc for its peak memory.
+
+Results are compared with benchmarks/baselines/pipeline.json, and the exit
+status is 1 if any stage is slower or bigger than the baseline by more than
+--tolerance. Baselines are per machine: re-record them with --save-baseline
+after a deliberate change or when moving to different hardware.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_parse import PAGES, load_page
+from folder_scan import FolderScanner, iter_media_files
+from renamer import PREFIX_PRESETS, DEFAULT_PREFIX, sanitize_filename, extract_episode_number, plan_folder
+from rename_plan import apply_plan
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "pipeline.json")
+
+# Release naming styles, one per group; {series} and {ep} are filled in
+RELEASE_STYLES = [
+    "[SubsPlease] {series} - {ep:02d} (1080p) [{crc}].mkv",
+    "[Erai-raws] {series} - {ep:02d} [1080p][Multiple Subtitle][{crc}].mkv",
+    "{dotted}.S01E{ep:02d}.1080p.WEB-DL.AAC2.0.H.264-VARYG.mkv",
+    "[Judas] {series} - S01E{ep:02d} [1080p][HEVC x265 10bit][Dual-Audio].mkv",
+    "{series} - Episode {ep} [720p].mp4",
+    "[EMBER] {series} {ep:02d}.mkv",
+    "{series} - {ep:02d}v2 [BD 1080p FLAC].mkv",
+    "[SubsPlease] {series} - {ep:02d} (1080p) [{crc}].ass",
+]
+
+# MAL titles contain characters Windows does not allow in filenames
+TITLE_STYLES = [
+    "The {n}th Secret",
+    "What's Wrong? Part {n}",
+    "Maomao: Poison Tester <{n}>",
+    "Cat & Mouse / Round {n}",
+    "\"Truth\" Revealed * {n}",
+]
+
+
+def series_name(index):
+    return f"Series {index:05d} no Hitorigoto"
+
+
+def release_name(series_index, episode):
+    series = series_name(series_index)
+    style = RELEASE_STYLES[series_index % len(RELEASE_STYLES)]
+    return style.format(series=series, dotted=series.replace(" ", "."), ep=episode,
+                        crc=f"{(series_index * 7919 + episode) & 0xFFFFFFFF:08X}")
+
+
+def episode_titles(series_index, episodes):
+    return {str(ep).zfill(2): TITLE_STYLES[(series_index + ep) % len(TITLE_STYLES)].format(n=ep)
+            for ep in range(1, episodes + 1)}
+
+
+def build_library(root, files, episodes):
+    """Create files // episodes series folders; returns [(folder path, series index)]"""
+    folders = []
+    for series_index in range(max(1, files // episodes)):
+        folder_path = os.path.join(root, series_name(series_index))
+        os.makedirs(folder_path)
+        for episode in range(1, episodes + 1):
+            open(os.path.join(folder_path, release_name(series_index, episode)), "w").close()
+        folders.append((folder_path, series_index))
+    return folders
+
+
+def run_stages(root, args):
+    """Yield (stage, items processed, callable) in pipeline order; each callable runs the stage"""
+    format_template = PREFIX_PRESETS[DEFAULT_PREFIX]
+    folders = build_library(root, args.files, args.episodes)
+    titles = {series_index: episode_titles(series_index, args.episodes) for _, series_index in folders}
+    state = {}
+    scanner = FolderScanner()
+    for _ in scanner.walk(root):
+        pass  # Remembers every folder's mtime, as the GUI and watcher have after their first look
+
+    def scan():
+        state["listing"] = {folder_path: list(iter_media_files(folder_path)) for folder_path, _ in folders}
+
+    def rescan():
+        for _ in scanner.walk(root):
+            pass  # Nothing changed, so no folder is read again
+
+    def extract():
+        for files in state["listing"].values():
+            for name in files:
+                extract_episode_number(name)
+
+    def sanitize():
+        for series_titles in titles.values():
+            for title in series_titles.values():
+                sanitize_filename(title)
+
+    def plan():
+        state["plans"] = [plan_folder(folder_path, titles[series_index], format_template,
+                                      files=state["listing"][folder_path])
+                          for folder_path, series_index in folders]
+
+    def rename():
+        for rename_plan in state["plans"]:
+            apply_plan(rename_plan)
+
+    pages = [(load_page(filename, args.pad_kb), parse) for filename, parse in PAGES.values()]
+
+    def parse():
+        for _ in range(args.parse_iterations):
+            for html, parse_page in pages:
+                parse_page(html)
+
+    total = len(folders) * args.episodes
+    yield "scan", total, scan
+    yield "rescan", total, rescan
+    yield "extract", total, extract
+    yield "sanitize", total, sanitize
+    yield "plan", total, plan
+    yield "rename", total, rename
+    yield "parse", args.parse_iterations * len(pages), parse
+
+
+def measure(args, traced):
+    """Run every stage on a fresh library; return {stage: seconds or peak KB}"""
+    root = tempfile.mkdtemp(prefix="animeep-bench-")
+    results = {}
+    try:
+        for stage, items, run in run_stages(root, args):
+            if traced:
+                tracemalloc.start()
+                run()
+                results[stage] = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.stop()
+            else:
+                start = time.perf_counter()
+                run()
+                results[stage] = (time.perf_counter() - start, items)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=40000, help="Episode files in the library (default: %(default)s)")
+    parser.add_argument("--episodes", type=int, default=25, help="Episodes per series folder (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per stage, fastest kept (default: %(default)s)")
+    parser.add_argument("--parse-iterations", type=int, default=10)
+    parser.add_argument("--pad-kb", type=int, default=300, help="Filler added to each MAL page (default: 300)")
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed slowdown or memory growth over the baseline (default: %(default)s)")
+    args = parser.parse_args()
+
+    timings = {}
+    for _ in range(max(1, args.repeat)):
+        for stage, (seconds, items) in measure(args, traced=False).items():
+            timings[stage] = min(timings.get(stage, (seconds, items)), (seconds, items))
+    peaks = measure(args, traced=True)
+    results = {stage: {"items_per_s": items / seconds, "ms": seconds * 1000, "peak_kb": peaks[stage]}
+               for stage, (seconds, items) in timings.items()}
+
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding="utf-8") as f:
+            baseline = json.load(f)
+    comparable = baseline.get("files") == args.files and baseline.get("episodes") == args.episodes
+
+    regressions = []
+    print(f"{'stage':<10}{'ms':>10}{'items/s':>12}{'peak KB':>10}  vs baseline")
+    for stage, result in results.items():
+        note = ""
+        if comparable and stage in baseline["stages"]:
+            before = baseline["stages"][stage]
+            speed = result["items_per_s"] / before["items_per_s"] - 1
+            # Growth is measured against at least 64 KB so stages that allocate next to nothing stay quiet
+            memory = (result["peak_kb"] - before["peak_kb"]) / max(before["peak_kb"], 64)
+            note = f"{speed:+.0%} speed, {memory:+.0%} memory"
+            if speed < -args.tolerance or memory > args.tolerance:
+                regressions.append(stage)
+                note += "  REGRESSION"
+        print(f"{stage:<10}{result['ms']:>10.1f}{result['items_per_s']:>12,.0f}{result['peak_kb']:>10.0f}  {note}")
+
+    if not comparable and baseline:
+        print(f"Baseline was recorded for --files {baseline.get('files')} --episodes {baseline.get('episodes')}; not compared")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump({"files": args.files, "episodes": args.episodes, "python": platform.python_version(),
+                       "machine": platform.machine(), "recorded": time.strftime("%Y-%m-%d"), "stages": results},
+                      f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {BASELINE}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
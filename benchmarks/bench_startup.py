@@ -0,0 +1,171 @@
+"""Cold-start time of the GUI, from process start to the window on screen and the title index ready.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--budget 1.0] [--max-stall 0.25]
+        [--dump-titles 28000] [--top 12] [--screen]
+
+Every run starts a fresh interpreter that imports AnimeEP_Renamer, builds and
+shows the window, and lets it run until preload() has finished: the deferred
+networking and parsing modules imported on the GUI thread after the first
+paint, and the title index built on the thread pool. The cache directory is a
+throwaway one holding a synthetic title dump of --dump-titles anime, like the
+mal_titles.tsv the README suggests installing. While preloading, a 5 ms timer
+on the GUI thread records the longest gap between its ticks, i.e. how long the
+window stopped responding.
+
+The fastest run is reported, split into interpreter start, imports, window
+(up to the first paint), and preload, followed by an import time breakdown per
+top-level package from one more run under python -X importtime.
+
+The exit status is 1 if the window took longer than --budget seconds to
+appear, if the GUI stalled for longer than --max-stall seconds while
+preloading, or if any of DEFERRED_MODULES was already loaded before the first
+paint. Runs on Qt's offscreen platform unless --screen is given.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Networking and parsing; the first paint must not wait for any of these
+DEFERRED_MODULES = ["mal_client", "mal_http", "mal_parse", "requests", "urllib3", "bs4", "lxml"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import AnimeEP_Renamer
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+imported = time.perf_counter()
+
+marks = {}
+original_preload = AnimeEP_Renamer.EpisodeRenamer.preload
+
+def preload(window):
+    if "painted" not in marks:
+        marks["painted"] = time.perf_counter()
+        marks["loaded"] = [name for name in sys.argv[1:] if name in sys.modules]
+    original_preload(window)
+
+AnimeEP_Renamer.EpisodeRenamer.preload = preload
+
+app = QApplication([])
+window = AnimeEP_Renamer.EpisodeRenamer()
+window.show()
+
+ticks = []
+
+def tick():
+    ticks.append(time.perf_counter())
+    if "painted" in marks and not window.search_pool.activeThreadCount():
+        app.quit()  # Title index built
+
+timer = QTimer()
+timer.setInterval(5)
+timer.timeout.connect(tick)
+timer.start()
+app.exec()
+ready = time.perf_counter()
+ticks = [marks["painted"]] + [at for at in ticks if at > marks["painted"]] + [ready]
+
+print(json.dumps({"painted_at": time.time() - (ready - marks["painted"]),
+                  "import_ms": (imported - start) * 1000,
+                  "window_ms": (marks["painted"] - imported) * 1000,
+                  "preload_ms": (ready - marks["painted"]) * 1000,
+                  "stall_ms": max(after - before for before, after in zip(ticks, ticks[1:])) * 1000,
+                  "loaded": marks["loaded"]}))
+"""
+
+
+def write_title_dump(cache_dir, count):
+    """Write a mal_titles.tsv of count synthetic anime, each with an alternative title"""
+    with open(os.path.join(cache_dir, "mal_titles.tsv"), "w", encoding="utf-8") as f:
+        for anime_id in range(1, count + 1):
+            f.write(f"{anime_id}\tSeries {anime_id:05d} no Hitorigoto\tThe Monologue of Series {anime_id}\n")
+
+
+def probe_env(args, cache_dir):
+    env = dict(os.environ, ANIMEEP_CACHE_DIR=cache_dir)
+    if not args.screen:
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def run_probe(args, cache_dir):
+    """Start the GUI once; return its timings, with interpreter_ms derived from when the process was spawned"""
+    spawned = time.time()
+    output = subprocess.run([sys.executable, "-c", PROBE, *DEFERRED_MODULES], cwd=ROOT,
+                            env=probe_env(args, cache_dir), capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["total_ms"] = (result["painted_at"] - spawned) * 1000
+    result["interpreter_ms"] = result["total_ms"] - result["import_ms"] - result["window_ms"]
+    return result
+
+
+def import_breakdown(args, cache_dir):
+    """Return {top-level package: self time in ms} for everything imported up to the end of preload"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=ROOT,
+                            env=probe_env(args, cache_dir), capture_output=True, text=True, check=True).stderr
+    packages = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts, fastest kept (default: %(default)s)")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Seconds the window may take to appear (default: %(default)s)")
+    parser.add_argument("--max-stall", type=float, default=0.25,
+                        help="Seconds the GUI may stop responding while preloading (default: %(default)s)")
+    parser.add_argument("--dump-titles", type=int, default=28000,
+                        help="Anime in the synthetic title dump (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=12, help="Packages listed in the import breakdown (default: %(default)s)")
+    parser.add_argument("--screen", action="store_true", help="Show the window on the real display instead of offscreen")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="animeep-startup-")
+    try:
+        write_title_dump(cache_dir, args.dump_titles)
+        best = min((run_probe(args, cache_dir) for _ in range(max(1, args.repeat))),
+                   key=lambda result: result["total_ms"])
+        packages = import_breakdown(args, cache_dir)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"{'stage':<14}{'ms':>10}")
+    for stage in ("interpreter", "import", "window", "total", "preload"):
+        print(f"{stage:<14}{best[stage + '_ms']:>10.1f}")
+    print(f"{'longest stall':<14}{best['stall_ms']:>10.1f}")
+
+    print(f"\n{'package':<24}{'import ms':>10}")
+    for package, ms in packages.most_common(args.top):
+        print(f"{package:<24}{ms:>10.1f}")
+    print(f"{'(all)':<24}{sum(packages.values()):>10.1f}")
+
+    failed = False
+    if best["loaded"]:
+        print(f"\nLoaded before the first paint: {', '.join(best['loaded'])}")
+        failed = True
+    if best["total_ms"] > args.budget * 1000:
+        print(f"\nWindow took {best['total_ms'] / 1000:.2f}s to appear, over the {args.budget:.2f}s budget")
+        failed = True
+    if best["stall_ms"] > args.max_stall * 1000:
+        print(f"\nGUI stopped responding for {best['stall_ms'] / 1000:.2f}s while preloading, "
+              f"over the {args.max_stall:.2f}s limit")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""End-to-end fetch → match → rename run against the offline MAL stand-in.
+
+    python benchmarks/e2e_offline.py [--synthetic-series 50] [--workers 4]
+        [--rate 50] [--latency 0.02] [--rate-limit-every 0] [--timeout-every 0]
+
+Builds a throwaway library with the recorded series (Kusuriya no Hitorigoto,
+and One Piece's first 250 episodes across three episode pages) plus
+--synthetic-series generated ones, runs batch_rename.process_series over it
+with a fresh cache, checks every file ended up with the expected name and
+reports throughput, per-series latency and time per pipeline stage. Nothing touches the network or the
+real cache directory.
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "fixtures"))
+
+# Must be set before the app modules import mal_cache
+WORK_DIR = tempfile.mkdtemp(prefix="animeep-e2e-")
+os.environ["ANIMEEP_CACHE_DIR"] = os.path.join(WORK_DIR, "data")
+
+import mal_client
+import mal_http
+from batch_rename import find_series_folders, process_series
+from instrumentation import format_metrics
+from mal_standin import MALStandIn, SYNTHETIC_EPISODES
+from rename_plan import RenameJournal
+from renamer import PREFIX_PRESETS, DEFAULT_PREFIX
+
+RECORDED_SERIES = {"Kusuriya no Hitorigoto": 24, "One Piece": 250}
+
+
+def release_name(series, episode):
+    return f"[SubsPlease] {series} - {episode:02d} (1080p) [ABCD1234].mkv"
+
+
+def build_library(root, synthetic_series):
+    """Create one folder per series with an episode file per episode; returns {series: episodes}"""
+    library = dict(RECORDED_SERIES)
+    for index in range(synthetic_series):
+        library[f"Synthetic Show {index:04d}"] = SYNTHETIC_EPISODES
+    for series, episodes in library.items():
+        folder_path = os.path.join(root, series)
+        os.makedirs(folder_path)
+        for episode in range(1, episodes + 1):
+            open(os.path.join(folder_path, release_name(series, episode)), "w").close()
+    return library
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic-series", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=mal_http.MAX_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=50.0,
+                        help="Client requests per second; the stand-in has no limit of its own (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the stand-in adds to each response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Stand-in answers every Nth request with 429")
+    parser.add_argument("--timeout-every", type=int, default=0, help="Stand-in hangs on every Nth request")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Client timeout while testing (default: %(default)s)")
+    args = parser.parse_args()
+
+    standin = MALStandIn(synthetic=True, latency=args.latency, rate_limit_every=args.rate_limit_every,
+                         retry_after=0.2, timeout_every=args.timeout_every, hang_seconds=args.timeout + 1).start()
+    mal_client.MAL_BASE_URL = standin.base_url
+    mal_http.set_rate_limit(args.rate, max(1, int(args.rate)))
+    mal_http.TIMEOUT = args.timeout
+    mal_http.BACKOFF_BASE = 0.1
+
+    try:
+        library_root = os.path.join(WORK_DIR, "library")
+        library = build_library(library_root, args.synthetic_series)
+        format_template = PREFIX_PRESETS[DEFAULT_PREFIX]
+        journal = RenameJournal(os.path.join(WORK_DIR, "journal.jsonl"))
+
+        latencies = []
+
+        def timed(folder_path):
+            start = time.perf_counter()
+            result = process_series(folder_path, format_template, journal)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+        start = time.perf_counter()
+        results = list(mal_http.imap_unordered(timed, find_series_folders(library_root), args.workers))
+        elapsed = time.perf_counter() - start
+
+        # Every file should now carry its episode title, e.g. "Episode 05 - Ms. Maomao.mkv"
+        renamed_pattern = re.compile(re.escape(format_template).replace(r"\{ep_number\}", r"\d{2,4}")
+                                     .replace(r"\{ep_title\}", ".+") + r"\.mkv$")
+        renamed = wrong = 0
+        for series, episodes in library.items():
+            for name in os.listdir(os.path.join(library_root, series)):
+                if renamed_pattern.match(name):
+                    renamed += 1
+                else:
+                    wrong += 1
+        total_files = sum(library.values())
+        failures = [(os.path.basename(folder_path), messages)
+                    for folder_path, anime_id, messages in results if anime_id is None]
+    finally:
+        standin.stop()
+
+    print(f"series           {len(library)}")
+    print(f"files renamed    {renamed}/{total_files}  ({wrong} left unrenamed)")
+    print(f"elapsed          {elapsed:.2f}s")
+    print(f"series/s         {len(library) / elapsed:.1f}")
+    print(f"files/s          {renamed / elapsed:.1f}")
+    print(f"series p50/p95   {percentile(latencies, 0.5) * 1000:.0f}ms / {percentile(latencies, 0.95) * 1000:.0f}ms")
+    print(f"requests served  {standin.request_count}  {dict(sorted(standin.status_counts.items()))}")
+    print()
+    print(format_metrics())
+    for series, messages in failures:
+        print(f"FAILED {series}: {messages}")
+
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    return 1 if failures or wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
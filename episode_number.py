@@ -0,0 +1,96 @@
+import os
+import re
+from collections import namedtuple
+
+EpisodeMatch = namedtuple("EpisodeMatch", ["episode", "season", "end_episode", "version", "confidence", "rule"])
+
+# Tokens that contain digits but are never the episode number. They are blanked
+# out (replaced by spaces, so positions and separators survive) before any rule
+# runs. Joined into one pattern so cleaning is a single pass over the name.
+NOISE_PATTERN = re.compile("|".join([
+    r'^\s*[\[\(\{][^\]\)\}]*[\]\)\}]',                        # Leading release group tag
+    r'[\[\(\{][0-9A-Fa-f]{8}[\]\)\}]',                         # CRC32
+    r'\b\d{3,4}x\d{3,4}\b',                                    # 1920x1080
+    r'\b\d{3,4}[pPiI]\b',                                      # 1080p
+    r'(?i:\b[xh]\.?26[45]\b|\b(?:HEVC|AVC|AV1|Hi10P?|Hi444PP?)\b)',
+    r'(?i:\b(?:10|8)[ -]?bits?\b)',
+    r'(?i:\b(?:AAC|AC3|E-?AC-?3|DDP?|DTS(?:-HD)?|FLAC|Opus|TrueHD)[ .]?\d?(?:\.\d)?\b)',
+    r'\b[1-9]\.[01]\b',                                        # Audio channels: 2.0, 5.1
+    r'[\[\(](?:19|20)\d{2}[\]\)]',                             # (2023)
+    r'\b(?:19|20)\d{2}-\d{2}-\d{2}\b',                         # Air dates
+]))
+SEPARATOR_PATTERN = re.compile(r'[_.]')
+EXTENSION_PATTERN = re.compile(r'\.[A-Za-z0-9]{1,5}')
+
+SEASON_PATTERN = re.compile(r'(?:\bseason\s*|\bS)(\d{1,2})(?!\d)', re.IGNORECASE)
+
+# (name, pattern, confidence), tried in order; the first match wins. Groups:
+# season (optional), episode, version (optional), end (optional range end).
+RULES = [
+    ("season_episode", re.compile(
+        r'(?<![A-Za-z])S(?P<season>\d{1,2})\s*-?\s*E[Pp]?\s*(?P<episode>\d{1,4})(?:v(?P<version>\d))?'
+        r'(?:\s*-\s*E?[Pp]?(?P<end>\d{1,4}))?(?!\d)', re.IGNORECASE), 0.95),
+    ("season_x_episode", re.compile(
+        r'(?<![\w])(?P<season>\d{1,2})x(?P<episode>\d{2,4})(?:v(?P<version>\d))?(?!\d)'), 0.85),
+    ("episode_keyword", re.compile(
+        r'(?<![A-Za-z])(?:episode|ep)\s*\.?\s*(?P<episode>\d{1,4})(?:v(?P<version>\d))?'
+        r'(?:\s*-\s*(?P<end>\d{1,4}))?(?!\d)', re.IGNORECASE), 0.9),
+    ("e_prefix", re.compile(
+        r'(?<![A-Za-z])E(?P<episode>\d{1,4})(?:v(?P<version>\d))?(?!\d)'), 0.8),
+    ("dash_separated", re.compile(
+        r'\s-\s+(?P<episode>\d{1,4})(?:v(?P<version>\d))?'
+        r'(?:\s*-\s*(?P<end>\d{1,4}))?(?=\s|$|[\[\(])'), 0.8),
+    ("bracketed", re.compile(
+        r'[\[\(](?P<episode>\d{1,4})(?:v(?P<version>\d))?(?:\s*-\s*(?P<end>\d{1,4}))?[\]\)]'), 0.7),
+    ("bare_number", re.compile(
+        r'(?<![\w])(?P<episode>\d{1,4})(?:v(?P<version>\d))?(?:-(?P<end>\d{1,4}))?(?![\w])'), 0.4),
+]
+
+
+def _mask(match):
+    return " " * len(match.group(0))
+
+
+def clean_filename(filename):
+    """Return filename without its extension and with noise tokens blanked out"""
+    stem, ext = os.path.splitext(filename)
+    if not EXTENSION_PATTERN.fullmatch(ext):
+        stem = filename  # Not a real extension, e.g. "Show - 05.5"
+    return SEPARATOR_PATTERN.sub(" ", NOISE_PATTERN.sub(_mask, stem))
+
+
+def parse_episode(filename):
+    """Return an EpisodeMatch for the episode a release filename contains, or None.
+
+    Rules run in order of how reliable they are, from explicit S01E05 markers
+    down to a bare number, and the match carries that rule's confidence.
+    """
+    cleaned = clean_filename(filename)
+    for name, pattern, confidence in RULES:
+        match = pattern.search(cleaned)
+        if not match:
+            continue
+
+        groups = match.groupdict()
+        episode = int(groups["episode"])
+        end = int(groups["end"]) if groups.get("end") else None
+        if end is not None and end <= episode:
+            end = None  # "05-03" is not a range
+
+        season = groups.get("season")
+        if season is None:
+            season_match = SEASON_PATTERN.search(cleaned)
+            season = season_match.group(1) if season_match else None
+
+        return EpisodeMatch(episode=episode,
+                            season=int(season) if season is not None else None,
+                            end_episode=end,
+                            version=int(groups["version"]) if groups.get("version") else None,
+                            confidence=confidence,
+                            rule=name)
+    return None
+
+
+def episode_key(ep_number):
+    """Canonical episode-map key: at least two digits, longer numbers kept whole ("05", "105", "1071")"""
+    return str(int(ep_number)).zfill(2)
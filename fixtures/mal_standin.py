@@ -0,0 +1,226 @@
+"""Offline stand-in for myanimelist.net, serving the recorded pages in fixtures/mal.
+
+    python fixtures/mal_standin.py --port 8800 --synthetic
+    python batch_rename.py /media/anime --mal-url http://127.0.0.1:8800
+
+Routes mirror MAL's: /search/all?q=...&cat=anime, /anime/<id>,
+/anime/<id>/<slug>/episode?offset=N and cover images. Recorded pages are looked
+up by filename (search_<query>.html, anime_<id>.html, anime_<id>_episode.html,
+anime_<id>_episode_offset<N>.html). With synthetic=True, anything without a
+recording is generated in MAL's markup instead, so libraries of any size can be
+served. Links in served pages are rewritten to point back at the stand-in.
+
+Faults are injected deterministically by request count: every Nth request can
+be answered with 429 + Retry-After, or held past the client's timeout.
+"""
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mal")
+
+# 1x1 grey PNG, served for every cover image
+COVER_IMAGE = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108000000003a7e9b55"
+    "0000000a49444154789c636800000082008177cd72b60000000049454e44ae426082")
+
+SYNTHETIC_ID_BASE = 900000
+SYNTHETIC_EPISODES = 24
+
+
+def query_key(query):
+    """Fixture-name form of a search query: "Kusuriya no Hitorigoto" -> "kusuriya_no_hitorigoto\""""
+    return re.sub(r'[^a-z0-9]+', '_', query.lower()).strip('_')
+
+
+def synthetic_id(query):
+    """Stable anime ID for a query that has no recording"""
+    return SYNTHETIC_ID_BASE + int(hashlib.sha1(query_key(query).encode()).hexdigest()[:6], 16) % 90000
+
+
+def synthetic_slug(title):
+    return re.sub(r'[^A-Za-z0-9]+', '_', title).strip('_')
+
+
+def page(title, body):
+    return (f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+            f'<title>{title} - MyAnimeList.net</title>\n</head>\n<body class="page-common">\n'
+            f'<div id="myanimelist">\n<div id="contentWrapper">\n{body}</div>\n</div>\n</body>\n</html>\n')
+
+
+def search_page(query, results):
+    """results: [(anime_id, title)]"""
+    entries = ""
+    for anime_id, title in results:
+        url = f"https://myanimelist.net/anime/{anime_id}/{synthetic_slug(title)}"
+        entries += (f'<div class="list di-t w100">\n'
+                    f'  <div class="picSurround di-tc thumb"><a href="{url}" class="hoverinfo_trigger">'
+                    f'<img data-src="https://cdn.myanimelist.net/r/100x140/images/anime/{anime_id}.jpg" class="lazyload"></a></div>\n'
+                    f'  <div class="information di-tc va-t pt4 pl8"><a href="{url}" class="hoverinfo_trigger fw-b fl-l">{title}</a></div>\n'
+                    f'</div>\n')
+    return page(f'Search Results for "{query}"',
+                f'<div id="content">\n<div class="content-left">\n<article>\n{entries}</article>\n</div>\n</div>\n')
+
+
+def details_page(anime_id, title, episodes):
+    slug = synthetic_slug(title)
+    return page(title, (
+        f'<link rel="canonical" href="https://myanimelist.net/anime/{anime_id}/{slug}">\n'
+        f'<h1 class="title-name h1_bold_none"><strong>{title}</strong></h1>\n'
+        f'<div class="leftside"><img class="lazyload ac" data-src="https://cdn.myanimelist.net/images/anime/{anime_id}.jpg" itemprop="image">\n'
+        f'<div class="spaceit_pad"><span class="dark_text">Episodes:</span> {episodes}</div>\n</div>\n'))
+
+
+def episode_page(anime_id, title, episodes, offset):
+    slug = synthetic_slug(title)
+    rows = "".join(
+        f'<tr class="episode-list-data"><td class="episode-number nowrap">{n}</td>'
+        f'<td class="episode-title fs12"><a href="https://myanimelist.net/anime/{anime_id}/{slug}/episode/{n}" class="fl-l fw-b ">'
+        f'{title} Episode {n}</a></td></tr>\n'
+        for n in range(offset + 1, min(offset + 100, episodes) + 1))
+    pagination = "".join(
+        f'<a class="link" href="https://myanimelist.net/anime/{anime_id}/{slug}/episode?offset={o}">{o + 1}</a>'
+        for o in range(0, episodes, 100)) if episodes > 100 else ""
+    return page(f"{title} - Episodes", (
+        f'<div class="pagination ac">{pagination}</div>\n'
+        f'<table class="episode_list"><tbody>\n{rows}</tbody></table>\n'))
+
+
+class MALStandIn:
+    """Threaded HTTP server impersonating MAL; start() it, point MAL_BASE_URL at base_url"""
+
+    def __init__(self, host="127.0.0.1", port=0, synthetic=False, synthetic_episodes=SYNTHETIC_EPISODES,
+                 latency=0.0, rate_limit_every=0, retry_after=1, timeout_every=0, hang_seconds=30.0):
+        self.synthetic = synthetic
+        self.synthetic_episodes = synthetic_episodes
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.timeout_every = timeout_every
+        self.hang_seconds = hang_seconds
+        self.request_count = 0
+        self.status_counts = {}
+        self._titles = {}  # synthetic anime ID -> title
+        self._lock = threading.Lock()
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                standin._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://{host}:{self._server.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _fixture(self, name):
+        path = os.path.join(FIXTURES, name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def _route(self, path, query):
+        """Return (status, content type, body) for a request path"""
+        if path.startswith("/search/"):
+            q = query.get("q", [""])[0]
+            html = self._fixture(f"search_{query_key(q)}.html")
+            if html is None and self.synthetic:
+                anime_id = synthetic_id(q)
+                self._titles[anime_id] = q.title()
+                html = search_page(q, [(anime_id, q.title())])
+            return (200, "text/html", html) if html is not None else (200, "text/html", search_page(q, []))
+
+        match = re.fullmatch(r'/anime/(\d+)(?:/[^/]+)?(/episode)?', path)
+        if match:
+            anime_id, is_episodes = int(match.group(1)), match.group(2)
+            offset = int(query.get("offset", ["0"])[0])
+            if is_episodes:
+                name = f"anime_{anime_id}_episode.html" if not offset else f"anime_{anime_id}_episode_offset{offset}.html"
+            else:
+                name = f"anime_{anime_id}.html"
+            html = self._fixture(name)
+            if html is None and anime_id in self._titles:
+                title = self._titles[anime_id]
+                html = (episode_page(anime_id, title, self.synthetic_episodes, offset) if is_episodes
+                        else details_page(anime_id, title, self.synthetic_episodes))
+            if html is not None:
+                return 200, "text/html", html
+
+        if re.search(r'\.(jpg|png)$', path):
+            return 200, "image/png", COVER_IMAGE
+
+        return 404, "text/html", page("404 Not Found", "<h1>404</h1>\n")
+
+    def _handle(self, request):
+        with self._lock:
+            self.request_count += 1
+            count = self.request_count
+
+        if self.latency:
+            time.sleep(self.latency)
+        if self.timeout_every and count % self.timeout_every == 0:
+            time.sleep(self.hang_seconds)
+            return self._send(request, 504, "text/html", b"")
+        if self.rate_limit_every and count % self.rate_limit_every == 0:
+            return self._send(request, 429, "text/html", b"", {"Retry-After": str(self.retry_after)})
+
+        url = urlparse(request.path)
+        status, content_type, body = self._route(url.path, parse_qs(url.query))
+        if isinstance(body, str):
+            body = re.sub(r'https://(?:cdn\.)?myanimelist\.net', self.base_url, body).encode("utf-8")
+        self._send(request, status, content_type, body)
+
+    def _send(self, request, status, content_type, body, extra_headers=None):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        try:
+            request.send_response(status)
+            request.send_header("Content-Type", content_type)
+            request.send_header("Content-Length", str(len(body)))
+            for name, value in (extra_headers or {}).items():
+                request.send_header(name, value)
+            request.end_headers()
+            request.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client gave up (e.g. timed out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--synthetic", action="store_true", help="Generate pages for queries without a recording")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--timeout-every", type=int, default=0, help="Hang on every Nth request")
+    args = parser.parse_args()
+
+    standin = MALStandIn(port=args.port, synthetic=args.synthetic, latency=args.latency,
+                         rate_limit_every=args.rate_limit_every, timeout_every=args.timeout_every)
+    print(f"MAL stand-in serving {FIXTURES} at {standin.base_url}")
+    try:
+        standin._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+from collections import OrderedDict, namedtuple
+
+# Files worth renaming; everything else in a series folder is left alone
+VIDEO_EXTENSIONS = {'.mkv', '.mp4', '.avi', '.m4v', '.mov', '.wmv', '.webm', '.ts', '.m2ts', '.flv', '.ogm'}
+SUBTITLE_EXTENSIONS = {'.ass', '.ssa', '.srt', '.sub', '.idx', '.vtt', '.sup'}
+# Renamed along with the video they belong to (same stem), never on their own
+SIDECAR_EXTENSIONS = {'.nfo', '.jpg', '.jpeg', '.png', '.webp', '.tbn'}
+COMPANION_EXTENSIONS = SUBTITLE_EXTENSIONS | SIDECAR_EXTENSIONS
+MEDIA_EXTENSIONS = VIDEO_EXTENSIONS | COMPANION_EXTENSIONS
+
+MAX_CACHED_FOLDERS = 4096
+
+FolderState = namedtuple("FolderState", ["mtime_ns", "files", "subfolders"])
+
+
+def is_media_name(name):
+    if name.startswith("."):
+        return False  # Hidden files, including the renamer's own temp names
+    return os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS
+
+
+def iter_media_files(folder_path):
+    """Yield the name of every video, subtitle and sidecar file in folder_path as the directory is read.
+
+    Uses os.scandir, so no full listing is built and, on most filesystems, no
+    file is stat-ed: the entry type comes with the directory read itself.
+    """
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if is_media_name(entry.name) and entry.is_file():
+                yield entry.name
+
+
+class FolderScanner:
+    """Remembers each folder's media files by the folder's mtime, so unchanged folders are not re-read.
+
+    A folder's mtime changes whenever an entry is added, removed or renamed in
+    it, which is exactly when its listing can change. Files growing in place
+    do not change it; watchers track those separately.
+    """
+
+    def __init__(self, max_folders=MAX_CACHED_FOLDERS):
+        self.max_folders = max_folders
+        self._states = OrderedDict()  # folder path -> FolderState, least recently scanned first
+
+    def scan(self, folder_path):
+        """Return (current FolderState, previous FolderState or None); both are the same object if unchanged"""
+        mtime_ns = os.stat(folder_path).st_mtime_ns
+        previous = self._states.get(folder_path)
+        if previous is not None and previous.mtime_ns == mtime_ns:
+            self._states.move_to_end(folder_path)
+            return previous, previous
+
+        files, subfolders = [], []
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.path)  # Like os.walk, symlinked folders are not descended into
+                elif is_media_name(entry.name) and entry.is_file():
+                    files.append(entry.name)
+        state = FolderState(mtime_ns, frozenset(files), tuple(subfolders))
+        self._states[folder_path] = state
+        self._states.move_to_end(folder_path)
+        while len(self._states) > self.max_folders:
+            self._states.popitem(last=False)
+        return state, previous
+
+    def forget(self, folder_path):
+        """Make the next scan of folder_path re-read it, e.g. after renaming files in it"""
+        self._states.pop(folder_path, None)
+
+    def walk(self, root):
+        """Yield (folder path, FolderState, previous FolderState or None) for root and every folder below it"""
+        pending = [root]
+        while pending:
+            folder_path = pending.pop()
+            try:
+                state, previous = self.scan(folder_path)
+            except OSError:
+                self._states.pop(folder_path, None)
+                continue  # Removed or unreadable since it was listed
+            pending.extend(state.subfolders)
+            yield folder_path, state, previous
@@ -0,0 +1,134 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+LOGGER_NAME = "animeep"
+DEFAULT_LEVEL = "WARNING"   # Per-page and per-span detail is DEBUG; production runs stay quiet
+
+# Fields (e.g. series=...) attached to every span and log record made inside an enclosing span
+_context = contextvars.ContextVar("animeep_context", default={})
+
+_metrics = {}               # stage -> [count, total seconds, max seconds]
+_metrics_lock = threading.Lock()
+
+
+def get_logger(name):
+    """Return the logger for one of our modules, under the shared "animeep" logger"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+log = get_logger("span")
+
+
+class ContextFilter(logging.Filter):
+    """Copy the enclosing spans' fields onto each record, as record.fields"""
+
+    def filter(self, record):
+        fields = dict(_context.get())
+        fields.update(getattr(record, "fields", {}))
+        record.fields = fields
+        return True
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, and any fields"""
+
+    def format(self, record):
+        entry = {"time": round(record.created, 6), "level": record.levelname,
+                 "logger": record.name, "message": record.getMessage()}
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain "LEVEL logger: message key=value ..." lines for the terminal"""
+
+    def format(self, record):
+        fields = " ".join(f"{key}={value}" for key, value in getattr(record, "fields", {}).items())
+        line = f"{record.levelname} {record.name}: {record.getMessage()}"
+        return f"{line} {fields}" if fields else line
+
+
+def configure_logging(level=DEFAULT_LEVEL, json_path=None):
+    """Send our log records to stderr at level and, optionally, everything (DEBUG and up) to a JSON lines file"""
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers.clear()
+    logger.propagate = False
+
+    console = logging.StreamHandler()
+    console.setLevel(level)
+    console.setFormatter(TextFormatter())
+    console.addFilter(ContextFilter())
+    logger.addHandler(console)
+    logger.setLevel(level)
+
+    if json_path:
+        json_file = logging.FileHandler(json_path, encoding="utf-8")
+        json_file.setLevel(logging.DEBUG)
+        json_file.setFormatter(JSONLinesFormatter())
+        json_file.addFilter(ContextFilter())
+        logger.addHandler(json_file)
+        logger.setLevel(logging.DEBUG)
+
+
+@contextmanager
+def span(stage, **fields):
+    """Time a block as one occurrence of stage, adding it to the metrics and logging it at DEBUG.
+
+    fields are attached to this span's record and to every span and log
+    record made inside it, so per-series spans tag their fetches and parses.
+    """
+    outer = _context.get()
+    token = _context.set({**outer, **fields}) if fields else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if token is not None:
+            _context.reset(token)
+        with _metrics_lock:
+            entry = _metrics.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("span", extra={"fields": {**outer, **fields, "stage": stage, "ms": round(elapsed * 1000, 3)}})
+
+
+def run_in_context(func):
+    """Wrap func so it runs with the caller's span fields, e.g. on a worker thread"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+def metrics():
+    """Return {stage: {"count", "total_ms", "mean_ms", "max_ms"}} for every span so far"""
+    with _metrics_lock:
+        return {stage: {"count": count, "total_ms": round(total * 1000, 3),
+                        "mean_ms": round(total * 1000 / count, 3), "max_ms": round(longest * 1000, 3)}
+                for stage, (count, total, longest) in _metrics.items()}
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def log_metrics():
+    """Record the metrics summary as one INFO record (lands in the JSON lines file as {"metrics": ...})"""
+    get_logger("metrics").info("metrics", extra={"fields": {"metrics": metrics()}})
+
+
+def format_metrics():
+    """Return the metrics as a text table, slowest stage first"""
+    rows = sorted(metrics().items(), key=lambda item: -item[1]["total_ms"])
+    lines = [f"{'stage':<12}{'count':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}"]
+    for stage, entry in rows:
+        lines.append(f"{stage:<12}{entry['count']:>8}{entry['total_ms']:>12.1f}{entry['mean_ms']:>10.2f}{entry['max_ms']:>10.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+
+import requests
+
+import mal_client
+import series_graph
+from folder_scan import FolderScanner, is_media_name, iter_media_files
+from renamer import extract_episode_number, group_of, plan_groups
+from rename_plan import apply_plan
+
+# watchdog is optional: without it the library is polled instead
+try:
+    from watchdog.observers import Observer
+    HAVE_WATCHDOG = True
+except ImportError:
+    HAVE_WATCHDOG = False
+
+SETTLE_SECONDS = 30     # A download is finished once its size and mtime stop changing for this long
+POLL_INTERVAL = 5
+
+# watchdog event types that can mean a new file: "closed" is only sent after writing. Opened,
+# read-only closes and "modified" (attributes, tags) also fire for files already in the library.
+NEW_FILE_EVENTS = {"created", "moved", "closed"}
+
+
+def is_episode_file(path):
+    return is_media_name(os.path.basename(path))
+
+
+class _EventForwarder:
+    """Minimal watchdog handler: file events that can mean a new file become LibraryWatcher.notice calls"""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in NEW_FILE_EVENTS:
+            return
+        if event.event_type == "moved":
+            # A finished download is usually renamed from "x.mkv.part" to "x.mkv"
+            self.watcher.notice(event.dest_path)
+        else:
+            self.watcher.notice(event.src_path)
+
+
+class LibraryWatcher:
+    """Rename new episodes as they land in the series folders under root.
+
+    Each new file is held until it has stopped growing for settle_seconds, then
+    renamed using the episode titles already known for its series folder. MAL is
+    only asked again when the file's episode number is not among them.
+    """
+
+    def __init__(self, root, format_template, journal=None,
+                 settle_seconds=SETTLE_SECONDS, poll_interval=POLL_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.format_template = format_template
+        self.journal = journal
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self._pending = {}      # path -> (size, mtime, time last changed)
+        self._lock = threading.Lock()
+        self._series = {}       # series folder -> anime ID
+        self._titles = {}       # series folder -> ({episode_number: title}, episode_of)
+        self._scanner = FolderScanner()  # Lets the poller skip folders whose contents have not changed
+        self._stop = threading.Event()
+
+    def series_folder(self, path):
+        """Return the folder directly under root that path belongs to, or None"""
+        relative = os.path.relpath(path, self.root)
+        parts = relative.split(os.sep)
+        if len(parts) < 2 or parts[0] == os.pardir:
+            return None
+        return os.path.join(self.root, parts[0])
+
+    def notice(self, path):
+        """Record a created/changed file; it is processed once it settles"""
+        if not is_episode_file(path) or self.series_folder(path) is None:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return  # Already gone (moved or deleted)
+        with self._lock:
+            previous = self._pending.get(path)
+            if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+                self._pending[path] = (stat.st_size, stat.st_mtime, time.monotonic())
+
+    def process_pending(self):
+        """Rename every pending file that has settled; returns the result messages"""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, (size, mtime, changed) in list(self._pending.items()):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    del self._pending[path]
+                    continue
+                if (stat.st_size, stat.st_mtime) != (size, mtime):
+                    self._pending[path] = (stat.st_size, stat.st_mtime, now)
+                elif size > 0 and now - changed >= self.settle_seconds:
+                    del self._pending[path]
+                    ready.append(path)
+
+        results = []
+        for path in ready:
+            try:
+                results.extend(self.handle_file(path))
+            except requests.RequestException as e:
+                results.append(f"Error contacting MAL for {path}: {str(e)}")
+            except OSError as e:
+                # Folder removed or unreadable since the file settled, or a rename that could not be rolled back
+                results.append(f"Error renaming {path}: {str(e)}")
+        return results
+
+    def titles_for(self, folder_path, files, name):
+        """Return (episode titles, episode_of) for a series folder, refreshing from MAL if name's episode is missing"""
+        if folder_path not in self._series:
+            self._series[folder_path] = mal_client.resolve_anime_id(os.path.basename(folder_path))
+        anime_id = self._series[folder_path]
+        if anime_id is None:
+            return {}, extract_episode_number
+
+        if folder_path not in self._titles:
+            self._titles[folder_path] = series_graph.folder_titles(anime_id, files)
+        episode_titles, episode_of = self._titles[folder_path]
+        if episode_of(name) not in episode_titles:
+            # Probably a newly aired episode: bypass the cache's freshness window
+            self._titles[folder_path] = series_graph.folder_titles(anime_id, files, refresh=True)
+        return self._titles[folder_path]
+
+    def handle_file(self, path):
+        """Rename one settled file in place, together with the other files of its episode"""
+        folder_path, name = os.path.split(path)
+        files = list(iter_media_files(folder_path))
+        group = group_of(name, files)
+        if group is None:
+            return []  # Artwork or an NFO with no matching video; left alone
+        if group.episode is None:
+            return [f"No episode number in {name}"]
+
+        episode_titles, episode_of = self.titles_for(self.series_folder(path), files, group.video or name)
+        if episode_of is not extract_episode_number:
+            group = group_of(name, files, episode_of)  # Numbered across seasons
+            if group is None or group.episode is None:  # A stray subtitle of a season MAL does not have is dropped
+                return [f"Cannot tell which season's episode {name} is"]
+        if group.episode not in episode_titles:
+            return [f"Episode {group.episode} of {name} is not on MAL yet"]
+
+        return apply_plan(plan_groups(folder_path, [group], episode_titles, self.format_template, existing=files),
+                          self.journal)
+
+    def poll(self):
+        """Notice files that appeared since the last scan (used without watchdog).
+
+        Only folders whose mtime changed are listed again. Files still growing
+        need no rescan: notice() picked them up when they appeared and
+        process_pending() follows their size until they settle.
+        """
+        for folder_path, state, previous in self._scanner.walk(self.root):
+            if state is previous:
+                continue
+            known = previous.files if previous is not None else frozenset()
+            for name in state.files - known:
+                self.notice(os.path.join(folder_path, name))
+
+    def run(self, on_result=print):
+        """Watch until stop() is called; files already in the library are left alone"""
+        observer = None
+        if HAVE_WATCHDOG:
+            observer = Observer()
+            observer.schedule(_EventForwarder(self), self.root, recursive=True)
+            observer.start()
+        else:
+            self.poll()
+            with self._lock:
+                self._pending.clear()  # The first scan only establishes what already exists
+        try:
+            while not self._stop.wait(self.poll_interval):
+                if observer is None:
+                    self.poll()
+                for message in self.process_pending():
+                    on_result(message)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,143 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+DATA_DIR = os.environ.get("ANIMEEP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".animeep_renamer"))
+DEFAULT_CACHE_PATH = os.path.join(DATA_DIR, "mal_cache.sqlite3")
+DEFAULT_TTL = 24 * 60 * 60              # Entries are fresh for a day unless told otherwise
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024    # Trim least recently used entries past this size
+DEFAULT_MAX_STALE = 90 * 24 * 60 * 60   # Keep expired entries this long for revalidation/offline use
+ACCESS_RESOLUTION = 60 * 60             # accessed_at is only rewritten once it is this old, so reads rarely write
+
+SCHEMA_VERSION = 3  # Bump whenever the shape of cached values changes; old entries are dropped
+
+CacheEntry = namedtuple("CacheEntry", ["value", "etag", "last_modified", "fresh"])
+
+
+class MALCache:
+    """Persistent key/value store for parsed MAL results (search hits, episode lists, images).
+
+    Values are stored as JSON, or as raw bytes for images. Expired entries are kept
+    around (up to max_stale) so they can be revalidated with ETag/Last-Modified or
+    served when MAL is unreachable.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 max_stale=DEFAULT_MAX_STALE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # WAL with synchronous=NORMAL: commits append to the log instead of syncing the database file
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS cache")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key):
+        """Return a CacheEntry for key, or None if nothing is stored.
+
+        The entry's access time, used to pick eviction victims, is only updated
+        when it is older than ACCESS_RESOLUTION; LRU order to the hour is plenty.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, value, etag, last_modified, expires_at, accessed_at FROM cache WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[5] >= ACCESS_RESOLUTION:
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+
+        kind, value, etag, last_modified, expires_at, accessed_at = row
+        if kind == "json":
+            value = json.loads(value)
+        return CacheEntry(value, etag, last_modified, expires_at > now)
+
+    def set(self, key, value, ttl=DEFAULT_TTL, etag=None, last_modified=None):
+        """Store value under key; bytes are kept as-is, anything else as JSON"""
+        if isinstance(value, (bytes, bytearray)):
+            kind, blob = "bytes", bytes(value)
+        else:
+            kind, blob = "json", json.dumps(value)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, blob, len(blob), etag, last_modified, now + ttl, now))
+            self._conn.commit()
+            self._writes += 1
+            should_evict = self._writes % 50 == 0
+        if should_evict:
+            self.evict()
+
+    def values(self, prefix):
+        """Return every JSON value whose key starts with prefix, fresh or not"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM cache WHERE kind = 'json' AND key >= ? AND key < ?",
+                (prefix, prefix + "\uffff")).fetchall()
+        return [json.loads(value) for value, in rows]
+
+    def touch(self, key, ttl=DEFAULT_TTL):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE cache SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                (now + ttl, now, key))
+            self._conn.commit()
+
+    def evict(self):
+        """Drop long-expired entries, then least recently used ones until under max_bytes"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?",
+                               (time.time() - self.max_stale,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                doomed = []
+                for key, size in self._conn.execute(
+                        "SELECT key, size FROM cache ORDER BY accessed_at"):
+                    if excess <= 0:
+                        break
+                    doomed.append((key,))
+                    excess -= size
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
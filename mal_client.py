@@ -0,0 +1,230 @@
+import os
+import threading
+
+import requests
+
+import mal_http
+from mal_cache import MALCache, DATA_DIR
+from instrumentation import get_logger, span
+from mal_parse import parse_search_results, parse_anime_details, parse_episode_page
+from title_index import TitleIndex, is_confident, rank_results, search_query
+
+headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Point at a stand-in (see fixtures/mal_standin.py) to run without the live site
+MAL_BASE_URL = os.environ.get("ANIMEEP_MAL_BASE_URL", "https://myanimelist.net").rstrip("/")
+
+# How long each kind of result stays fresh before it is revalidated
+SEARCH_TTL = 24 * 60 * 60
+DETAILS_TTL = 7 * 24 * 60 * 60
+EPISODES_TTL = 24 * 60 * 60      # Airing shows gain episodes weekly
+IMAGE_TTL = 30 * 24 * 60 * 60
+
+EPISODES_PER_PAGE = 100  # MAL's episode list page size
+
+# Optional tab-separated MAL title dump (anime ID, title, alternative titles...) loaded into the title index
+TITLE_DUMP_PATH = os.path.join(DATA_DIR, "mal_titles.tsv")
+
+log = get_logger("mal_client")
+
+_cache = None
+_cache_lock = threading.Lock()
+_title_index = None
+_title_index_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the shared on-disk cache, opening it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MALCache()
+    return _cache
+
+
+def get_title_index():
+    """Return the shared title index, built on first use from cached metadata and the title dump"""
+    global _title_index
+    with _title_index_lock:
+        if _title_index is None:
+            index = TitleIndex()
+            for meta in get_cache().values("meta:"):
+                if meta.get("title"):
+                    index.add(meta["id"], meta["title"])
+            if os.path.exists(TITLE_DUMP_PATH):
+                index.load_dump(TITLE_DUMP_PATH)
+            _title_index = index
+    return _title_index
+
+
+def cached_fetch(url, parse, ttl, binary=False, refresh=False):
+    """Return parse(page) for url, going to MAL only when the cached copy is stale.
+
+    refresh treats a fresh entry as stale. Stale entries are revalidated with If-None-Match/If-Modified-Since, and are
+    served as-is if MAL cannot be reached; revalidation makes a single quick
+    attempt, so an offline run is not held up by retries. Empty parse results
+    are not cached so that a broken page is retried next time.
+    """
+    cache = get_cache()
+    entry = cache.get(url)
+    if entry and entry.fresh and not refresh:
+        log.debug("cache hit", extra={"fields": {"url": url}})
+        return entry.value
+
+    request_headers = dict(headers)
+    if entry and entry.etag:
+        request_headers['If-None-Match'] = entry.etag
+    if entry and entry.last_modified:
+        request_headers['If-Modified-Since'] = entry.last_modified
+
+    try:
+        with span("fetch", url=url):
+            if entry:
+                response = mal_http.get(url, headers=request_headers, retries=0, timeout=mal_http.REVALIDATE_TIMEOUT)
+            else:
+                response = mal_http.get(url, headers=request_headers)
+        log.debug("fetched", extra={"fields": {"url": url, "status": response.status_code}})
+        if entry and response.status_code == 304:
+            cache.touch(url, ttl)
+            return entry.value
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if entry:
+            log.warning("Serving stale copy of %s: %s", url, e)
+            return entry.value  # Offline: stale data beats no data
+        raise
+
+    with span("parse", url=url):
+        value = parse(response.content if binary else response.text)
+    if value:
+        cache.set(url, value, ttl=ttl,
+                  etag=response.headers.get('ETag'),
+                  last_modified=response.headers.get('Last-Modified'))
+    return value
+
+
+def sort_episodes(episode_titles):
+    """Return episode_titles as a dict ordered by episode number"""
+    return dict(sorted(episode_titles.items(), key=lambda item: int(item[0])))
+
+
+def remember_anime(anime_id, fields):
+    """Merge fields into the anime's metadata record, keeping values already known"""
+    cache = get_cache()
+    key = f"meta:{anime_id}"
+    entry = cache.get(key)
+    meta = dict(entry.value) if entry else {"id": anime_id}
+    changed = entry is None or not entry.fresh
+    for field, value in fields.items():
+        if value and not meta.get(field):
+            meta[field] = value
+            changed = True
+    if changed:
+        cache.set(key, meta, ttl=DETAILS_TTL)
+        if meta.get("title"):
+            get_title_index().add(anime_id, meta["title"])
+    return meta
+
+
+def get_anime_meta(anime_id, need=()):
+    """Return the metadata record for an anime: id, title, slug, image_url, type, episodes, relations.
+
+    Records are seeded from search results, so the details page is only fetched
+    when a field listed in need is still missing.
+    """
+    entry = get_cache().get(f"meta:{anime_id}")
+    meta = entry.value if entry else {"id": anime_id}
+    if any(not meta.get(field) for field in need):
+        meta = remember_anime(anime_id, fetch_anime_details(anime_id))
+    return meta
+
+
+def search_anime(title):
+    """Search MAL and return [title, anime_id] pairs in result order, one per anime"""
+    search_url = f"{MAL_BASE_URL}/search/all?q={title.replace(' ', '%20')}&cat=anime"
+    results = cached_fetch(search_url, parse_search_results, SEARCH_TTL)
+    titles = {}
+    for result in results:
+        remember_anime(result["id"], result)
+        if result["title"]:
+            titles.setdefault(result["id"], result["title"])  # Skips the untitled cover-image links
+    return [[anime_title, anime_id] for anime_id, anime_title in titles.items()]
+
+
+def find_anime(name):
+    """Return [title, anime_id] candidates for a folder or release name, best match first.
+
+    Answered from the local title index when it has a confident match, so a
+    series seen before needs no request at all. Otherwise MAL is searched with
+    the release tags stripped and its results are ranked against name.
+    """
+    candidates = get_title_index().lookup(name)
+    if is_confident(candidates):
+        return [[candidate.title, candidate.anime_id] for candidate in candidates]
+    return rank_results(name, search_anime(search_query(name) or name))
+
+
+def resolve_anime_id(title):
+    """Return the MAL ID that best matches a folder or release name, or None"""
+    results = find_anime(title)
+    return results[0][1] if results else None
+
+
+def fetch_anime_details(anime_id):
+    """Return {"title", "slug", "image_url", "type", "episodes", "relations"} from an anime's details page"""
+    return cached_fetch(f"{MAL_BASE_URL}/anime/{anime_id}", parse_anime_details, DETAILS_TTL)
+
+
+def episodes_url(anime_id, offset=0):
+    """Return the URL of one page of an anime's episode list"""
+    slug = get_anime_meta(anime_id, need=("slug",))["slug"]
+
+    url = f"{MAL_BASE_URL}/anime/{anime_id}/{slug}/episode"
+    return f"{url}?offset={offset}" if offset else url
+
+
+def fetch_episode_page(anime_id, offset=0, refresh=False):
+    """Return the parsed episode list page at offset ({} if it has no episodes)"""
+    url = episodes_url(anime_id, offset)
+    return cached_fetch(url, parse_episode_page, EPISODES_TTL, refresh=refresh)
+
+
+def iter_episode_pages(anime_id, refresh=False):
+    """Yield {episode_number: title} for each page of the episode list as it arrives.
+
+    When the episode count is already known every page is fetched concurrently
+    straight away. Otherwise the first page is fetched on its own to discover the
+    pagination; MAL only links nearby pages, so each fetched page may reveal
+    further offsets. Pages are yielded in completion order. refresh revalidates
+    every page with MAL even if the cached copy is still fresh.
+    """
+    episodes = get_anime_meta(anime_id).get("episodes")
+    pending = list(range(0, episodes, EPISODES_PER_PAGE)) if episodes else [0]
+    fetched = set()
+    last_offset = 0
+    while pending:
+        fetched.update(pending)
+        for offset, page in mal_http.imap_unordered(
+                lambda offset: (offset, fetch_episode_page(anime_id, offset, refresh)), pending):
+            if not page:
+                continue
+            yield page["episodes"]
+            last_offset = max([last_offset, *page["offsets"]])
+            if len(page["episodes"]) >= EPISODES_PER_PAGE:
+                last_offset = max(last_offset, offset + EPISODES_PER_PAGE)  # A full page may not be the last
+        pending = [offset for offset in range(0, last_offset + 1, EPISODES_PER_PAGE) if offset not in fetched]
+
+
+def fetch_episode_titles(anime_id, refresh=False):
+    """Return {episode_number: title} for every page of an anime's episode list, in episode order"""
+    episode_titles = {}
+    for page in iter_episode_pages(anime_id, refresh):
+        episode_titles.update(page)
+    return sort_episodes(episode_titles)
+
+
+def fetch_image(img_url):
+    """Return the raw bytes of a cover image"""
+    return cached_fetch(img_url, lambda content: content, IMAGE_TTL, binary=True)
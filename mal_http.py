@@ -0,0 +1,145 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import get_logger, run_in_context
+
+REQUESTS_PER_SECOND = 1.5   # Sustained rate MAL tolerates before answering 429
+BURST = 3                   # Requests allowed back to back after an idle period
+MAX_CONCURRENCY = 4         # Requests in flight at once (also the connection pool size)
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0          # Seconds; doubled on every retry
+TIMEOUT = 15
+REVALIDATE_TIMEOUT = 3      # Seconds; for refreshing a cached page, which is served stale if MAL does not answer
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+log = get_logger("mal_http")
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a request may be sent"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def block_for(self, seconds):
+        """Pause every caller, e.g. when MAL sends Retry-After"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+def parse_retry_after(value):
+    """Return the Retry-After header as seconds, or None if absent/invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_session = None
+_session_lock = threading.Lock()
+_limiter = TokenBucket()
+_in_flight = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+
+def set_rate_limit(rate, burst=BURST):
+    """Change the shared limiter, e.g. to load-test a local stand-in faster than MAL allows"""
+    global _limiter
+    _limiter = TokenBucket(rate, burst)
+
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_CONCURRENCY, pool_maxsize=MAX_CONCURRENCY)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+    return _session
+
+
+def get(url, headers=None, retries=MAX_RETRIES, timeout=TIMEOUT):
+    """GET url through the shared session, rate limiter and retry policy.
+
+    429 and 5xx responses are retried with exponential backoff, honouring
+    Retry-After; the final response is returned as-is for the caller to check.
+    Connection errors are retried the same way and re-raised once retries run out.
+    retries=0 makes a single attempt, for callers with a fallback of their own.
+    """
+    session = get_session()
+    for attempt in range(retries + 1):
+        _limiter.acquire()
+        try:
+            with _in_flight:
+                response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            delay = BACKOFF_BASE * 2 ** attempt * random.uniform(0.5, 1.5)
+            log.info("Retrying %s in %.1fs: %s", url, delay, e)
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = BACKOFF_BASE * 2 ** attempt * random.uniform(0.5, 1.5)
+        log.info("Retrying %s in %.1fs: HTTP %d", url, delay, response.status_code)
+        if response.status_code == 429:
+            _limiter.block_for(delay)  # Everyone backs off, not just this request
+        else:
+            time.sleep(delay)
+    return response
+
+
+def map_concurrent(func, items, max_workers=MAX_CONCURRENCY):
+    """Return [func(item) for item in items], running up to max_workers calls at once.
+
+    The rate limiter still applies, so this fills the allowed rate instead of
+    exceeding it.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run_in_context(func), items))
+
+
+def imap_unordered(func, items, max_workers=MAX_CONCURRENCY):
+    """Yield func(item) for each item as soon as it finishes, up to max_workers at once"""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        func = run_in_context(func)
+        futures = [pool.submit(func, item) for item in items]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,198 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from episode_number import episode_key
+from instrumentation import get_logger
+
+# lxml is optional: it parses MAL pages several times faster than html.parser.
+# Without it we fall back to BeautifulSoup, restricted with SoupStrainer to the
+# few tags each page type needs. Strainers match on tag name, or on class through
+# a callable that splits the class list itself: matching on a class name at
+# parse time misses multi-class elements in some bs4 versions.
+try:
+    import lxml.html
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+BACKEND = "lxml" if HAVE_LXML else "soup"
+
+log = get_logger("mal_parse")
+
+OFFSET_PATTERN = re.compile(r'/episode\?offset=(\d+)')
+EPISODES_PATTERN = re.compile(r'Episodes:\s*(\d+)')
+# Related Entries label ("Sequel (TV)" tile, "Prequel:" table row) -> relation we follow
+RELATION_PATTERN = re.compile(r'^\s*(Prequel|Sequel)\b', re.IGNORECASE)
+# In the page head, so found long before the body; it has no class for a strainer to pick it out by
+CANONICAL_PATTERN = re.compile(r'<link\b[^>]*\brel="canonical"[^>]*\bhref="([^"]+)"')
+
+# Classes of the details page elements the soup backend reads; everything else is skipped while parsing
+DETAILS_CLASSES = {"title-name", "ac", "spaceit_pad", "related-entries", "entries-table"}
+
+
+def _has_class(name):
+    """XPath predicate matching elements whose class list contains name"""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+def _has_details_class(value):
+    """Strainer test for a class attribute, given as a string or, in some bs4 versions, a list"""
+    tokens = value.split() if isinstance(value, str) else value or []
+    return not DETAILS_CLASSES.isdisjoint(tokens)
+
+
+def _anime_id_from_url(url):
+    return url.split("/")[-2]
+
+
+def _slug_from_url(url):
+    return url.rstrip("/").split("/")[-1]
+
+
+def _episode_count(text):
+    """Return the count from an "Episodes: 24" info line, or None while MAL lists it as Unknown"""
+    match = EPISODES_PATTERN.search(text)
+    return int(match.group(1)) if match else None
+
+
+def _info_value(text):
+    """Return the value of an "Type: TV" info line, or None if it is empty"""
+    value = text.split(":", 1)[-1].strip()
+    return value or None
+
+
+def _add_relation(relations, label, urls):
+    """Add the anime IDs among urls to relations if label names a prequel or sequel"""
+    match = RELATION_PATTERN.match(label)
+    if match:
+        relations[match.group(1).lower()].extend(
+            _anime_id_from_url(url) for url in urls if "/anime/" in url)
+
+
+def parse_search_results(html):
+    """Return a record per anime link on a MAL search page, in page order.
+
+    Each hit has two links, the cover image (no title) and the title, so every
+    record has "id" and "slug" plus either "image_url" or "title".
+    """
+    results = []
+    if BACKEND == "lxml":
+        tree = lxml.html.fromstring(html)
+        for link in tree.xpath(f'//a[{_has_class("hoverinfo_trigger")}][contains(@href, "/anime/")]'):
+            images = link.xpath('.//img')
+            results.append((link.get("href"), link.text_content().strip(),
+                            images[0].attrib if images else {}))
+    else:
+        soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a"))
+        for link in soup.select("a.hoverinfo_trigger"):
+            if "/anime/" in link.get("href", ""):
+                image = link.find("img")
+                results.append((link["href"], link.text.strip(), image.attrs if image else {}))
+
+    return [{"id": _anime_id_from_url(url),
+             "slug": _slug_from_url(url),
+             "title": title,
+             "image_url": img_attrs.get("data-src") or img_attrs.get("src")}
+            for url, title, img_attrs in results]
+
+
+def parse_anime_details(html):
+    """Return the title, URL slug, cover image URL, type, episode count and relations from an anime details page.
+
+    "relations" is {"prequel": [anime_id, ...], "sequel": [...]}, from both the
+    tiles and the table of the Related Entries section.
+    """
+    relations = {"prequel": [], "sequel": []}
+    if BACKEND == "lxml":
+        tree = lxml.html.fromstring(html)
+        title_elements = tree.xpath(f'//h1[{_has_class("title-name")}]')
+        title = title_elements[0].text_content().strip() if title_elements else ""
+        img_elements = tree.xpath(f'//img[{_has_class("ac")}]')
+        img_attrs = img_elements[0].attrib if img_elements else {}
+        canonical = tree.xpath('//link[@rel="canonical"]/@href')
+        canonical = canonical[0] if canonical else None
+        info = tree.xpath(f'//div[{_has_class("spaceit_pad")}][span[normalize-space()="Episodes:"]]')
+        episodes = _episode_count(info[0].text_content()) if info else None
+        info = tree.xpath(f'//div[{_has_class("spaceit_pad")}][span[normalize-space()="Type:"]]')
+        anime_type = _info_value(info[0].text_content()) if info else None
+        for entry in tree.xpath(f'//div[{_has_class("related-entries")}]//div[{_has_class("entry")}]'):
+            label = entry.xpath(f'.//div[{_has_class("relation")}]')
+            _add_relation(relations, label[0].text_content() if label else "",
+                          entry.xpath(f'.//div[{_has_class("title")}]//a/@href'))
+        for row in tree.xpath(f'//table[{_has_class("entries-table")}]//tr[td]'):
+            cells = row.xpath('./td')
+            _add_relation(relations, cells[0].text_content(), row.xpath('./td[last()]//a/@href'))
+    else:
+        soup = BeautifulSoup(html, "html.parser",
+                             parse_only=SoupStrainer(["h1", "img", "div", "table"], class_=_has_details_class))
+        title_element = soup.find("h1", class_="title-name")
+        title = title_element.text.strip() if title_element else ""
+        img_element = soup.find("img", class_="ac")
+        img_attrs = img_element.attrs if img_element else {}
+        canonical = CANONICAL_PATTERN.search(html)
+        canonical = canonical.group(1) if canonical else None
+        info = [div for div in soup.select("div.spaceit_pad") if "Episodes:" in div.text]
+        episodes = _episode_count(info[0].text) if info else None
+        info = [div for div in soup.select("div.spaceit_pad") if div.text.strip().startswith("Type:")]
+        anime_type = _info_value(info[0].text) if info else None
+        for entry in soup.select("div.related-entries div.entry"):
+            label = entry.select_one("div.relation")
+            _add_relation(relations, label.text if label else "",
+                          [link.get("href", "") for link in entry.select("div.title a")])
+        for row in soup.select("table.entries-table tr"):
+            cells = row.find_all("td")
+            if cells:
+                _add_relation(relations, cells[0].text, [link.get("href", "") for link in cells[-1].select("a")])
+
+    return {"title": title,
+            "slug": _slug_from_url(canonical) if canonical else title.replace(" ", "_"),
+            "image_url": img_attrs.get("data-src") or img_attrs.get("src"),
+            "type": anime_type,
+            "episodes": episodes,
+            "relations": relations}
+
+
+def _episode_rows(html):
+    """Yield (episode_number_text, title_text) for every row of the episode table"""
+    if BACKEND == "lxml":
+        tree = lxml.html.fromstring(html)
+        for row in tree.xpath(f'//table[{_has_class("episode_list")}]/tbody/tr'):
+            number = row.xpath(f'./td[{_has_class("episode-number")}]')
+            title = row.xpath(f'./td[{_has_class("episode-title")}]//a[{_has_class("fl-l")} and {_has_class("fw-b")}]')
+            yield (number[0].text_content() if number else None,
+                   title[0].text_content() if title else None)
+    else:
+        soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("table"))
+        for row in soup.select("table.episode_list tbody tr"):
+            number = row.select_one("td.episode-number")
+            title = row.select_one("td.episode-title a.fl-l.fw-b")
+            yield (number.text if number else None,
+                   title.text if title else None)
+
+
+def parse_episode_page(html):
+    """Return {"episodes": {episode_number: title}, "offsets": [...]} for one episode list page.
+
+    "offsets" lists every ?offset= value linked from the page's pagination, so the
+    first page tells us which other pages exist. Returns {} if no episodes were found.
+    """
+    episode_titles = {}
+    for ep_number, ep_title in _episode_rows(html):
+        try:
+            ep_number = episode_key(ep_number.strip().rstrip('.'))
+            ep_title = ep_title.strip()
+
+            if ep_number and ep_title:
+                episode_titles[ep_number] = ep_title
+        except (AttributeError, ValueError) as e:
+            log.warning("Skipping unparseable episode row: %s", e)
+            continue
+
+    log.debug("episode page parsed", extra={"fields": {"episodes": len(episode_titles)}})
+
+    if not episode_titles:
+        return {}
+
+    offsets = sorted({int(offset) for offset in OFFSET_PATTERN.findall(html)})
+    return {"episodes": episode_titles, "offsets": offsets}
@@ -0,0 +1,124 @@
+from bisect import bisect_left
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from renamer import extract_episode_number, group_episode_files, group_moves, plan_groups
+
+
+class RenamePreviewModel(QAbstractTableModel):
+    """Dry-run table of current name → proposed name → status for every file in a folder.
+
+    Files and proposals are updated in place: set_files inserts/removes only the
+    rows that changed, and set_mapping emits dataChanged only for rows whose
+    proposal changed, so views of large folders never get rebuilt from scratch.
+    """
+
+    COLUMNS = ["Current Name", "New Name", "Status"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.folder_path = None
+        self.episode_titles = {}
+        self.format_template = None
+        self._files = []        # Sorted filenames, one per row
+        self._episodes = {}     # filename -> episode key (or None), extracted once per file and reused by grouping
+        self._proposals = {}    # filename -> (new name, status)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._files)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        name = self._files[index.row()]
+        if index.column() == 0:
+            return name
+        new_name, status = self._proposals.get(name, ("", ""))
+        return new_name if index.column() == 1 else status
+
+    def file_at(self, row):
+        return self._files[row] if 0 <= row < len(self._files) else None
+
+    def set_files(self, folder_path, files):
+        """Show files (any order), inserting and removing only the rows that changed"""
+        files = sorted(files)
+        wanted = set(files)
+        changes = len(wanted.symmetric_difference(self._episodes))
+        if folder_path != self.folder_path or changes > max(64, len(files) // 4):
+            # A new folder or a mostly different listing is cheaper to reset than to patch
+            self.beginResetModel()
+            self.folder_path = folder_path
+            self._files = files
+            self._episodes = {name: extract_episode_number(name) for name in files}
+            self._proposals = {}
+            self.endResetModel()
+        else:
+            for row in range(len(self._files) - 1, -1, -1):
+                if self._files[row] not in wanted:
+                    self.beginRemoveRows(QModelIndex(), row, row)
+                    del self._episodes[self._files[row]]
+                    self._proposals.pop(self._files[row], None)
+                    del self._files[row]
+                    self.endRemoveRows()
+            for name in files:
+                if name in self._episodes:
+                    continue
+                row = bisect_left(self._files, name)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._files.insert(row, name)
+                self._episodes[name] = extract_episode_number(name)
+                self.endInsertRows()
+        self._refresh_proposals()
+
+    def set_mapping(self, episode_titles, format_template):
+        """Recompute proposed names for new episode titles or a new filename format"""
+        self.episode_titles = episode_titles
+        self.format_template = format_template
+        self._refresh_proposals()
+
+    def _refresh_proposals(self):
+        previous = self._proposals
+        proposals = {name: ("", "Not part of an episode") for name in self._files}
+        groups = group_episode_files(self._files, episode_of=self._episodes.__getitem__)
+        for group in groups:
+            names = [name for name, suffix in group.companions]
+            if group.video is not None:
+                names.insert(0, group.video)
+            if group.episode is None:
+                status = "No episode number found"
+            elif self.format_template is None or group.episode not in self.episode_titles:
+                status = f"Episode {group.episode} has no title yet"
+            else:
+                for old, new in group_moves(group, self.episode_titles, self.format_template):
+                    if old == new:
+                        proposals[old] = (new, "Already named")
+                continue
+            for name in names:
+                proposals[name] = ("", status)
+
+        if self.format_template is not None:
+            plan = plan_groups(self.folder_path, groups, self.episode_titles, self.format_template,
+                               existing=self._files)
+            for move in plan.moves:
+                proposals[move.old] = (move.new, "Will rename")
+            for conflict in plan.conflicts:
+                proposals[conflict.old] = (conflict.new, f"Conflict: {conflict.reason}")
+
+        # Emit one dataChanged per run of consecutive changed rows
+        self._proposals = proposals
+        changed_start = None
+        for row, name in enumerate(self._files + [None]):
+            changed = name is not None and proposals[name] != previous.get(name)
+            if changed and changed_start is None:
+                changed_start = row
+            elif not changed and changed_start is not None:
+                self.dataChanged.emit(self.index(changed_start, 1), self.index(row - 1, 2))
+                changed_start = None
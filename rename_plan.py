@@ -0,0 +1,165 @@
+import os
+import json
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from instrumentation import get_logger
+from mal_cache import DATA_DIR
+
+JOURNAL_DIR = os.path.join(DATA_DIR, "journal")
+
+RenameMove = namedtuple("RenameMove", ["old", "new"])        # Names within the plan's folder
+RenameConflict = namedtuple("RenameConflict", ["old", "new", "reason"])
+
+log = get_logger("rename_plan")
+
+
+class RenamePlan:
+    """Every rename for one folder, checked for collisions before anything is touched"""
+
+    def __init__(self, folder_path, moves, conflicts):
+        self.folder_path = folder_path
+        self.moves = moves
+        self.conflicts = conflicts
+
+
+def plan_moves(folder_path, mapping, existing=None):
+    """Return a RenamePlan for the (old, new) pairs in mapping.
+
+    A move is refused when another file is already being renamed to the same
+    name, or when the target exists and is not itself being renamed away.
+    Chains and swaps (A→B, B→A) are fine: apply_plan goes through temp names.
+    Names are compared with os.path.normcase, so case-insensitive filesystems
+    are handled on Windows.
+    """
+    if existing is None:
+        existing = os.listdir(folder_path)
+    existing = {os.path.normcase(name) for name in existing}
+    sources = {os.path.normcase(old) for old, new in mapping if old != new}
+
+    moves, conflicts, claimed = [], [], set()
+    for old, new in mapping:
+        if old == new:
+            continue  # Already has the right name
+        target = os.path.normcase(new)
+        if target in claimed:
+            conflicts.append(RenameConflict(old, new, "another file is being renamed to this name"))
+        elif target in existing and target not in sources and target != os.path.normcase(old):
+            conflicts.append(RenameConflict(old, new, "a file with this name already exists"))
+        else:
+            claimed.add(target)
+            moves.append(RenameMove(old, new))
+
+    # A refused move leaves its source in place, which may block a move into that name
+    blocked = {os.path.normcase(conflict.old) for conflict in conflicts}
+    while blocked:
+        still_ok = []
+        newly_blocked = set()
+        for move in moves:
+            if os.path.normcase(move.new) in blocked and os.path.normcase(move.new) != os.path.normcase(move.old):
+                conflicts.append(RenameConflict(move.old, move.new, "target is held by a file that cannot be renamed"))
+                newly_blocked.add(os.path.normcase(move.old))
+            else:
+                still_ok.append(move)
+        moves = still_ok
+        blocked = newly_blocked
+
+    return RenamePlan(folder_path, moves, conflicts)
+
+
+class RenameJournal:
+    """Append-only JSON-lines record of applied renames, so a batch can be undone.
+
+    Each folder gets a "planned" line (with the temp names used) before anything
+    moves, "staged" once every file sits at its temp name, then "done" or
+    "rolled_back". That is enough to undo a batch even if it was interrupted.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(JOURNAL_DIR, exist_ok=True)
+            path = os.path.join(JOURNAL_DIR, time.strftime("%Y%m%d-%H%M%S") + f"-{uuid.uuid4().hex[:6]}.jsonl")
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, folder_path, state, moves):
+        line = json.dumps({"folder": folder_path, "state": state, "time": time.time(),
+                           "moves": [list(move) for move in moves]})
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _temp_name(index):
+    return f".animeep-tmp-{uuid.uuid4().hex[:12]}-{index}"
+
+
+def _rename(folder_path, source, target):
+    os.rename(os.path.join(folder_path, source), os.path.join(folder_path, target))
+
+
+def apply_plan(plan, journal=None):
+    """Apply every move in plan, all or nothing, and return human-readable results.
+
+    Every source is first moved to a temp name, then every temp to its target,
+    so swaps and chains never overwrite a file. If any step fails, the steps
+    already taken are reversed.
+    """
+    results = [f"Skipped {conflict.old} → {conflict.new}: {conflict.reason}" for conflict in plan.conflicts]
+    if not plan.moves:
+        return results
+
+    folder_path = plan.folder_path
+    moves = [(move.old, move.new, _temp_name(index)) for index, move in enumerate(plan.moves)]
+    record = journal.record if journal else lambda *args: None
+
+    record(folder_path, "planned", moves)
+    done = []  # (source, target) steps taken, for rollback
+    try:
+        for old, new, temp in moves:
+            _rename(folder_path, old, temp)
+            done.append((old, temp))
+        record(folder_path, "staged", moves)
+        for old, new, temp in moves:
+            if os.path.lexists(os.path.join(folder_path, new)):
+                raise FileExistsError(f"{new} appeared while renaming")
+            _rename(folder_path, temp, new)
+            done.append((temp, new))
+    except OSError as e:
+        for source, target in reversed(done):
+            _rename(folder_path, target, source)
+        record(folder_path, "rolled_back", moves)
+        log.warning("Rolled back %d renames in %s: %s", len(moves), folder_path, e)
+        return results + [f"Error renaming in {folder_path}, nothing was changed: {str(e)}"]
+    record(folder_path, "done", moves)
+    log.info("Renamed %d files in %s", len(moves), folder_path)
+
+    return [f"{old} → {new}" for old, new, temp in moves] + results
+
+
+def undo_journal(path):
+    """Revert every folder recorded in a journal, newest first, and return the results"""
+    batches = {}  # (folder, moves) -> last recorded state, in order first planned
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            batches[(entry["folder"], tuple(map(tuple, entry["moves"])))] = entry["state"]
+
+    results = []
+    for (folder_path, moves), state in reversed(list(batches.items())):
+        if state == "rolled_back":
+            continue
+        # "planned": interrupted while staging, files are at their temp or old name.
+        # "staged": interrupted while finishing, files are at their temp or new name.
+        undo = []
+        for old, new, temp in moves:
+            if os.path.lexists(os.path.join(folder_path, temp)):
+                undo.append(RenameMove(temp, old))
+            elif state != "planned":
+                undo.append(RenameMove(new, old))
+        results.extend(apply_plan(plan_moves(folder_path, undo)))
+    return results
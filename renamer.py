@@ -0,0 +1,171 @@
+import os
+import re
+from collections import namedtuple
+
+from episode_number import parse_episode, episode_key
+from folder_scan import VIDEO_EXTENSIONS, SUBTITLE_EXTENSIONS, COMPANION_EXTENSIONS, iter_media_files
+from instrumentation import span
+from rename_plan import RenameConflict, plan_moves, apply_plan
+
+PREFIX_PRESETS = {
+    "Episode # - ": "Episode {ep_number} - {ep_title}",
+    "Ep# - ": "Ep{ep_number} - {ep_title}",
+    "E# - ": "E{ep_number} - {ep_title}",
+    "# - ": "{ep_number} - {ep_title}"
+}
+DEFAULT_PREFIX = "Episode # - "
+
+# One trailing tag a companion adds to its video's stem and keeps when renamed:
+# language codes (".en", ".pt-BR", ".jpn"), subtitle flavours, Kodi artwork names
+COMPANION_TAG_PATTERN = re.compile(
+    r'(?:\.[a-z]{2}(?:[-_][a-z]{2})?'
+    r'|\.(?:eng|jpn|spa|por|fre|fra|ger|deu|ita|rus|chi|zho|chs|cht|kor|ara|pol|tur|vie|ind|tha|dut|nld|swe|nor|dan|fin|heb|hun|cze|ces|gre|ell|ukr|rum|ron|may|msa|hin)'
+    r'|[.\-_](?:forced|sdh|cc|hi|default|full|signs|songs|thumb|poster|fanart|banner|landscape))$',
+    re.IGNORECASE)
+
+# A video and the companions renamed with it. video is None for subtitles with no video in the folder;
+# companions are (name, suffix) pairs, where suffix (".en.srt", "-thumb.jpg") is kept on rename.
+EpisodeGroup = namedtuple("EpisodeGroup", ["episode", "video", "companions"])
+
+def sanitize_filename(filename):
+    """Remove/replace invalid Windows filename characters"""
+    # Windows invalid filename characters
+    invalid_chars = {'<': '', '>': '', ':': '-', '"': "'", '/': '-', 
+                    '\\': '-', '|': '-', '?': '', '*': ''}
+    
+    for char, replacement in invalid_chars.items():
+        filename = filename.replace(char, replacement)
+    return filename.strip()
+
+def extract_episode_number(filename):
+    """Extract episode number from filename as an episode-map key ("05", "105")"""
+    match = parse_episode(filename)
+    if match:
+        return episode_key(match.episode)
+    return None
+
+def build_new_filename(file, ep_number, ep_title, format_template, suffix=None):
+    """Return the new name for file, keeping its extension (or the given suffix, e.g. ".en.srt")"""
+    return format_template.format(
+        ep_number=ep_number,
+        ep_title=sanitize_filename(ep_title)
+    ) + (os.path.splitext(file)[1] if suffix is None else suffix)
+
+def companion_parts(name):
+    """Yield the (stem, suffix) splits of a companion file, shortest suffix first.
+
+    "ep05.en.forced.srt" gives ("ep05.en.forced", ".srt"), ("ep05.en", ".forced.srt")
+    and ("ep05", ".en.forced.srt"); the caller picks the stem that names a video.
+    """
+    stem, suffix = os.path.splitext(name)
+    yield stem, suffix
+    match = COMPANION_TAG_PATTERN.search(stem)
+    while match and match.start() > 0:
+        stem, suffix = stem[:match.start()], stem[match.start():] + suffix
+        yield stem, suffix
+        match = COMPANION_TAG_PATTERN.search(stem)
+
+def group_episode_files(files, episode_of=extract_episode_number):
+    """Split a folder's files into EpisodeGroups, in one pass over the names.
+
+    Companions join the video whose stem they extend (ep05.mkv + ep05.en.srt +
+    ep05-thumb.jpg). Subtitles named differently from every video fall back to
+    the only video with the same episode number, or form their own group;
+    NFOs and images never do, since "season02-poster.jpg" is not episode 2.
+    Episode numbers are only extracted for videos and those stray subtitles.
+    Videos sharing a stem (ep05.mkv, ep05.mp4) each get a group; their
+    companions join the first, and still share both videos' stem once renamed.
+    """
+    videos = {}         # stem -> first video name with that stem
+    groups = {}         # video name -> EpisodeGroup
+    companions = []
+    for name in files:
+        stem, ext = os.path.splitext(name)
+        if ext.lower() in VIDEO_EXTENSIONS:
+            videos.setdefault(stem, name)
+            groups[name] = EpisodeGroup(episode_of(name), name, [])
+        elif ext.lower() in COMPANION_EXTENSIONS:
+            companions.append(name)
+
+    by_episode = {}     # episode -> its only video, or None when several videos share it
+    for group in groups.values():
+        by_episode[group.episode] = None if group.episode in by_episode else group.video
+
+    strays = {}         # episode -> group of subtitles without a video
+    for name in companions:
+        for stem, suffix in companion_parts(name):
+            if stem in videos:
+                groups[videos[stem]].companions.append((name, suffix))
+                break
+        else:
+            if os.path.splitext(name)[1].lower() not in SUBTITLE_EXTENSIONS:
+                continue
+            episode = episode_of(name)
+            if episode is None:
+                continue
+            video = by_episode.get(episode)
+            if video is not None:
+                groups[video].companions.append((name, suffix))
+            else:
+                strays.setdefault(episode, EpisodeGroup(episode, None, [])).companions.append((name, suffix))
+
+    return list(groups.values()) + list(strays.values())
+
+def group_of(name, files, episode_of=extract_episode_number):
+    """Return the EpisodeGroup among files that name belongs to, or None"""
+    return next((group for group in group_episode_files(files, episode_of)
+                 if name == group.video or name in (companion for companion, suffix in group.companions)), None)
+
+def group_moves(group, episode_titles, format_template):
+    """Return the (old, new) pairs that rename every file in group, or [] if its episode has no title"""
+    if group.episode is None or group.episode not in episode_titles:
+        return []
+    title = episode_titles[group.episode]
+    moves = [(name, build_new_filename(name, group.episode, title, format_template, suffix))
+             for name, suffix in group.companions]
+    if group.video is not None:
+        moves.insert(0, (group.video, build_new_filename(group.video, group.episode, title, format_template)))
+    return moves
+
+def plan_groups(folder_path, groups, episode_titles, format_template, existing=None):
+    """Return a RenamePlan that renames each group completely or not at all.
+
+    When one file of a group cannot be renamed, the rest of the group stays
+    put too, so a subtitle never ends up named differently from its video.
+    """
+    mappings = [[(old, new) for old, new in group_moves(group, episode_titles, format_template) if old != new]
+                for group in groups]
+    held = []   # Conflicts of groups taken out of the plan because some of their files conflict
+    while True:
+        plan = plan_moves(folder_path, [move for mapping in mappings for move in mapping], existing)
+        refused = {conflict.old: conflict for conflict in plan.conflicts}
+        split = [mapping for mapping in mappings
+                 if any(old in refused for old, new in mapping) and not all(old in refused for old, new in mapping)]
+        if not split:
+            plan.conflicts.extend(held)
+            return plan
+        for mapping in split:
+            held.extend(refused.get(old) or RenameConflict(old, new, "another file of this episode cannot be renamed")
+                        for old, new in mapping)
+            mappings.remove(mapping)
+
+def plan_folder(folder_path, episode_titles, format_template, files=None, episode_of=extract_episode_number):
+    """Return the RenamePlan giving every file with a known episode its new name.
+
+    files may be any iterable of names; by default the folder's video, subtitle
+    and sidecar files are streamed from disk. Companions are renamed with
+    their video (see group_episode_files). episode_of maps a name to its key
+    in episode_titles, e.g. SeriesTitles.episode_of for multi-season folders.
+    """
+    with span("scan"):
+        files = list(iter_media_files(folder_path) if files is None else files)
+    with span("extract"):
+        groups = group_episode_files(files, episode_of)
+    with span("plan"):
+        return plan_groups(folder_path, groups, episode_titles, format_template, existing=files)
+
+def rename_files(folder_path, episode_titles, format_template, journal=None, episode_of=extract_episode_number):
+    """Rename episode files based on scraped titles, all or nothing per folder"""
+    plan = plan_folder(folder_path, episode_titles, format_template, episode_of=episode_of)
+    with span("rename"):
+        return apply_plan(plan, journal)
@@ -0,0 +1,121 @@
+import os
+
+import mal_client
+import mal_http
+from episode_number import parse_episode, episode_key
+from folder_scan import VIDEO_EXTENSIONS
+from instrumentation import get_logger, span
+from renamer import extract_episode_number
+
+MAX_CHAIN = 24              # Entries visited in each direction along prequel/sequel links
+SEASON_TYPES = {"TV", "ONA", None}  # Recap movies, OVAs and specials in a chain are stepped over, not numbered
+
+log = get_logger("series_graph")
+
+
+def _follow(anime_id, relation, details):
+    """Yield the IDs reached from anime_id by following relation links, fetching each entry's details once"""
+    for _ in range(MAX_CHAIN):
+        linked = details[anime_id].get("relations", {}).get(relation) or []
+        if not linked or linked[0] in details:
+            return  # End of the chain, or a cycle
+        anime_id = linked[0]
+        details[anime_id] = mal_client.fetch_anime_details(anime_id)
+        mal_client.remember_anime(anime_id, details[anime_id])
+        yield anime_id
+
+
+def series_chain(anime_id):
+    """Return [(anime_id, details)] for every season of anime_id's series, first season first.
+
+    MAL gives each season its own entry; they are linked as prequel and sequel.
+    The details pages have to be read one after another, since each names the
+    next. anime_id itself is always included, whatever its type.
+    """
+    details = {anime_id: mal_client.fetch_anime_details(anime_id)}
+    earlier = list(_follow(anime_id, "prequel", details))
+    later = list(_follow(anime_id, "sequel", details))
+    return [(entry, details[entry]) for entry in earlier[::-1] + [anime_id] + later
+            if entry == anime_id or details[entry].get("type") in SEASON_TYPES]
+
+
+class SeriesTitles:
+    """Episode titles for a folder of one season, numbered both within that season and across the series.
+
+    titles maps the folder's own season-relative numbers ("03") and absolute
+    numbers across all seasons ("27") to titles. Where they overlap, the
+    folder's own season wins: in a 2nd season folder a bare "05" means S2E05.
+    episode_of() reads names with a season marker ("S02E03") through the
+    right season instead.
+    """
+
+    def __init__(self, anime_id, seasons):
+        """seasons: [(anime_id, episode count or None, {episode_number: title})], first season first"""
+        self.anime_id = anime_id
+        self.seasons = [season_id for season_id, count, titles in seasons]
+        self.offsets = {}   # season anime ID -> absolute number of the episode before its first
+        own = {}
+        combined = {}
+        offset = 0
+        for season_id, count, titles in seasons:
+            self.offsets[season_id] = offset
+            if season_id == anime_id:
+                own = titles
+            for number, title in titles.items():
+                combined[episode_key(offset + int(number))] = title
+            offset += max([count or 0, *(int(number) for number in titles)])
+        self._own = own
+        combined.update(own)
+        self.titles = mal_client.sort_episodes(combined)
+
+    def episode_of(self, filename):
+        """Return the episode-map key for filename, mapping "S02E03" to its absolute number when needed"""
+        match = parse_episode(filename)
+        if match is None:
+            return None
+        if match.season is None:
+            return episode_key(match.episode)
+        if not 1 <= match.season <= len(self.seasons):
+            return None  # A season MAL does not have (yet), or specials
+        season_id = self.seasons[match.season - 1]
+        if season_id == self.anime_id:
+            return episode_key(match.episode)
+        key = episode_key(self.offsets[season_id] + match.episode)
+        return None if key in self._own else key  # Taken by the folder's own season: ambiguous, leave the file alone
+
+
+def fetch_series_titles(anime_id, refresh=False):
+    """Return the SeriesTitles of anime_id's series, fetching every season's episode list concurrently"""
+    with span("series_chain", anime_id=anime_id):
+        chain = series_chain(anime_id)
+    log.debug("series chain", extra={"fields": {"seasons": [entry for entry, details in chain]}})
+    season_titles = mal_http.map_concurrent(
+        lambda entry: mal_client.fetch_episode_titles(entry[0], refresh), chain)
+    return SeriesTitles(anime_id, [(entry, details.get("episodes"), titles)
+                                   for (entry, details), titles in zip(chain, season_titles)])
+
+
+def needs_series(files, episode_titles):
+    """Whether the videos among files need other seasons' titles: a season marker past 1, or a number not in episode_titles"""
+    for name in files:
+        if os.path.splitext(name)[1].lower() not in VIDEO_EXTENSIONS:
+            continue
+        match = parse_episode(name)
+        if match is not None and ((match.season or 1) > 1 or episode_key(match.episode) not in episode_titles):
+            return True
+    return False
+
+
+def folder_titles(anime_id, files, refresh=False):
+    """Return (episode_titles, episode_of) for renaming files, a folder of anime_id's episodes.
+
+    The series' other seasons are only looked up when the files need them, so
+    a folder numbered like its MAL entry costs no more than before.
+    """
+    episode_titles = mal_client.fetch_episode_titles(anime_id, refresh)
+    if not needs_series(files, episode_titles):
+        return episode_titles, extract_episode_number
+    series = fetch_series_titles(anime_id, refresh)
+    if len(series.seasons) == 1:
+        return episode_titles, extract_episode_number
+    return series.titles, series.episode_of
@@ -1,18 +1,209 @@
-import re
+"""Checks for the parsers, the episode number rules, rename planning and the batch pipeline.
 
-def extract_episode_number(filename):
-    """Extract episode number from filename using regex"""
-    episode_pattern = re.compile(
-        r'(?:[Ss]?\d*[EePp](\d{1,2}))|(\d{1,2})(?:[_\-\. ]|$)'
-    )
-    match = episode_pattern.search(filename)
-    if match:
-        episode_number = match.group(1) or match.group(2)
-        return str(int(episode_number)).zfill(2)
-    return None
+    python test.py          (or: python -m pytest test.py)
 
-print(extract_episode_number("2 Zom 100 [AnimeKaizoku]"))
+Everything runs offline: MAL pages come from fixtures/mal, directly or through
+the MALStandIn server, and the cache, journals and libraries live in a
+throwaway directory.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import traceback
 
-print(extract_episode_number("Season1_episode09.avi"))
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "fixtures"))
 
-print(extract_episode_number("[AK] Link Click [S1EP05] [720p] [Dual] AnimeKaizoku"))
\ No newline at end of file
+# Must be set before the app modules import mal_cache
+WORK_DIR = tempfile.mkdtemp(prefix="animeep-test-")
+os.environ["ANIMEEP_CACHE_DIR"] = os.path.join(WORK_DIR, "data")
+atexit.register(shutil.rmtree, WORK_DIR, ignore_errors=True)
+
+import mal_client
+import mal_http
+import mal_parse
+from batch_rename import process_series
+from folder_scan import FolderScanner
+from library_watcher import LibraryWatcher
+from mal_standin import MALStandIn, FIXTURES
+from rename_plan import RenameJournal, apply_plan, plan_moves, undo_journal
+from renamer import PREFIX_PRESETS, DEFAULT_PREFIX, extract_episode_number, plan_folder
+from series_graph import SeriesTitles
+
+CORPUS = os.path.join(ROOT, "benchmarks", "release_filenames.tsv")
+FORMAT = PREFIX_PRESETS[DEFAULT_PREFIX]
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def make_folder(*names):
+    """Create a fresh folder holding an empty file per name; returns its path"""
+    folder_path = tempfile.mkdtemp(dir=WORK_DIR)
+    for name in names:
+        open(os.path.join(folder_path, name), "w").close()
+    return folder_path
+
+
+def backends():
+    """Yield each parsing backend available here, with mal_parse switched to it"""
+    original = mal_parse.BACKEND
+    try:
+        for backend in ["lxml", "soup"] if mal_parse.HAVE_LXML else ["soup"]:
+            mal_parse.BACKEND = backend
+            yield backend
+    finally:
+        mal_parse.BACKEND = original
+
+
+def test_parse_search_results():
+    for backend in backends():
+        results = mal_parse.parse_search_results(fixture("search_kusuriya_no_hitorigoto.html"))
+        titled = [(result["id"], result["title"]) for result in results if result["title"]]
+        assert titled[0] == ("54492", "Kusuriya no Hitorigoto"), backend
+        assert ("58514", "Kusuriya no Hitorigoto 2nd Season") in titled, backend
+        assert results[0]["image_url"].startswith("https://cdn.myanimelist.net/"), backend
+
+
+def test_parse_anime_details():
+    for backend in backends():
+        details = mal_parse.parse_anime_details(fixture("anime_54492.html"))
+        assert details == {"title": "Kusuriya no Hitorigoto",
+                           "slug": "Kusuriya_no_Hitorigoto",
+                           "image_url": "https://cdn.myanimelist.net/images/anime/1708/138033.jpg",
+                           "type": "TV",
+                           "episodes": 24,
+                           "relations": {"prequel": [], "sequel": ["58514"]}}, backend
+        details = mal_parse.parse_anime_details(fixture("anime_58514.html"))
+        assert details["relations"] == {"prequel": ["54492"], "sequel": []}, backend
+
+
+def test_parse_episode_page():
+    for backend in backends():
+        page = mal_parse.parse_episode_page(fixture("anime_54492_episode.html"))
+        assert len(page["episodes"]) == 24 and page["offsets"] == [], backend
+        assert page["episodes"]["05"] == "The Cursed Sword", backend
+        page = mal_parse.parse_episode_page(fixture("anime_21_episode.html"))
+        assert page["episodes"]["01"] and page["offsets"] == [100, 200], backend
+        assert mal_parse.parse_episode_page(fixture("anime_54492.html")) == {}, backend
+
+
+def test_extract_episode_number():
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = [line.rstrip("\n").split("\t") for line in f if line.strip() and not line.startswith("#")]
+    wrong = [(name, expected, extract_episode_number(name)) for name, expected in corpus
+             if extract_episode_number(name) != (f"{int(expected):02d}" if expected else None)]
+    assert not wrong, wrong
+
+
+def test_plan_folder_keeps_videos_sharing_a_stem():
+    plan = plan_folder("/library/Show", {"05": "Title"}, FORMAT, files=["ep05.mkv", "ep05.mp4", "ep05.en.srt"])
+    assert not plan.conflicts, plan.conflicts
+    assert sorted(plan.moves) == [("ep05.en.srt", "Episode 05 - Title.en.srt"),
+                                  ("ep05.mkv", "Episode 05 - Title.mkv"),
+                                  ("ep05.mp4", "Episode 05 - Title.mp4")]
+
+
+def test_walk_skips_symlinked_folders():
+    root = make_folder()
+    os.makedirs(os.path.join(root, "Series", "Extras"))
+    os.symlink(root, os.path.join(root, "Series", "loop"), target_is_directory=True)
+    walked = sorted(os.path.relpath(folder_path, root) for folder_path, state, previous in FolderScanner().walk(root))
+    assert walked == [".", "Series", os.path.join("Series", "Extras")], walked
+
+
+def test_plan_swap_and_chain():
+    folder_path = make_folder("a.mkv", "b.mkv", "c.mkv")
+    plan = plan_moves(folder_path, [("a.mkv", "b.mkv"), ("b.mkv", "a.mkv"), ("c.mkv", "d.mkv")])
+    assert not plan.conflicts
+    apply_plan(plan)
+    assert sorted(os.listdir(folder_path)) == ["a.mkv", "b.mkv", "d.mkv"]
+
+
+def test_plan_collisions():
+    folder_path = make_folder("a.mkv", "b.mkv", "c.mkv", "d.mkv", "other.mkv")
+    plan = plan_moves(folder_path, [("a.mkv", "same.mkv"), ("b.mkv", "same.mkv"),
+                                    ("c.mkv", "other.mkv"), ("d.mkv", "b.mkv")])
+    refused = {conflict.old: conflict.reason for conflict in plan.conflicts}
+    assert [move.old for move in plan.moves] == ["a.mkv"]
+    assert "being renamed to this name" in refused["b.mkv"], refused
+    assert "already exists" in refused["c.mkv"], refused
+    assert "cannot be renamed" in refused["d.mkv"], refused  # b.mkv stays put, so d.mkv cannot take its name
+
+
+def test_apply_rolls_back():
+    folder_path = make_folder("a.mkv", "b.mkv")
+    plan = plan_moves(folder_path, [("a.mkv", "x.mkv"), ("b.mkv", "y.mkv")])
+    open(os.path.join(folder_path, "y.mkv"), "w").close()  # Appears after planning
+    results = apply_plan(plan)
+    assert "nothing was changed" in results[-1], results
+    assert sorted(os.listdir(folder_path)) == ["a.mkv", "b.mkv", "y.mkv"]
+
+
+def test_undo_journal():
+    folder_path = make_folder("a.mkv", "b.mkv")
+    journal = RenameJournal(os.path.join(WORK_DIR, "undo.jsonl"))
+    apply_plan(plan_moves(folder_path, [("a.mkv", "b.mkv"), ("b.mkv", "c.mkv")]), journal)
+    assert sorted(os.listdir(folder_path)) == ["b.mkv", "c.mkv"]
+    undo_journal(journal.path)
+    assert sorted(os.listdir(folder_path)) == ["a.mkv", "b.mkv"]
+
+
+def test_watcher_skips_unknown_season():
+    root = make_folder()
+    os.makedirs(os.path.join(root, "Show"))
+    path = os.path.join(root, "Show", "Show S03E01.en.srt")
+    open(path, "w").close()
+    series = SeriesTitles(1, [(1, 2, {"01": "One", "02": "Two"}), (2, 2, {"01": "Three", "02": "Four"})])
+    watcher = LibraryWatcher(root, FORMAT)
+    watcher.titles_for = lambda folder_path, files, name: (series.titles, series.episode_of)
+    assert watcher.handle_file(path) == ["Cannot tell which season's episode Show S03E01.en.srt is"]
+    assert os.path.exists(path)
+
+
+def test_process_series():
+    standin = MALStandIn().start()
+    base_url = mal_client.MAL_BASE_URL
+    mal_client.MAL_BASE_URL = standin.base_url
+    mal_http.set_rate_limit(100, 100)
+    try:
+        folder_path = os.path.join(WORK_DIR, "library", "Kusuriya no Hitorigoto")
+        os.makedirs(folder_path)
+        for name in ["[SubsPlease] Kusuriya no Hitorigoto - 01 (1080p) [A1B2C3D4].mkv",
+                     "[SubsPlease] Kusuriya no Hitorigoto - 05 (1080p) [A1B2C3D4].mkv",
+                     "[SubsPlease] Kusuriya no Hitorigoto - 05 (1080p) [A1B2C3D4].en.srt",
+                     "Kusuriya.no.Hitorigoto.S02E03.1080p.WEB.H264-VARYG.mkv"]:
+            open(os.path.join(folder_path, name), "w").close()
+        journal = RenameJournal(os.path.join(WORK_DIR, "series.jsonl"))
+        folder, anime_id, messages = process_series(folder_path, FORMAT, journal)
+    finally:
+        standin.stop()
+        mal_client.MAL_BASE_URL = base_url
+    assert anime_id == "54492", messages
+    assert sorted(os.listdir(folder_path)) == ["Episode 01 - Maomao.mkv",
+                                               "Episode 05 - The Cursed Sword.en.srt",
+                                               "Episode 05 - The Cursed Sword.mkv",
+                                               "Episode 27 - Suirei.mkv"]  # S02E03, numbered across seasons
+
+
+def main():
+    tests = [(name, func) for name, func in globals().items() if name.startswith("test_")]
+    failed = 0
+    for name, func in tests:
+        try:
+            func()
+            print(f"ok      {name}")
+        except Exception:
+            failed += 1
+            print(f"FAILED  {name}")
+            traceback.print_exc()
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
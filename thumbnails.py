@@ -0,0 +1,123 @@
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+THUMBNAIL_SIZE = (100, 150)
+PIXMAP_CACHE_SIZE = 64      # Downscaled pixmaps kept in memory
+PREFETCH_COUNT = 3          # Top search results whose thumbnails are loaded ahead of selection
+LOADER_THREADS = 2
+
+
+def thumbnail_key(anime_id):
+    return f"thumb:{anime_id}"
+
+
+def load_thumbnail(anime_id):
+    """Return the downscaled cover of an anime as a QImage (null if it has none); runs off the GUI thread.
+
+    Downscaled covers are stored in the on-disk cache, so the full-size image
+    and the details page are only fetched the first time an anime is shown.
+    """
+    import mal_client  # Kept out of startup; already loaded once covers are requested (see AnimeEP_Renamer.py)
+
+    cache = mal_client.get_cache()
+    entry = cache.get(thumbnail_key(anime_id))
+    if entry is not None:
+        return QImage.fromData(entry.value)  # Cover art never really changes; stale is fine
+
+    img_url = mal_client.get_anime_meta(anime_id, need=("image_url",))["image_url"]
+    if not img_url:
+        return QImage()
+    image = QImage.fromData(mal_client.fetch_image(img_url))
+    if image.isNull():
+        return image
+    image = image.scaled(*THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    cache.set(thumbnail_key(anime_id), bytes(data), ttl=mal_client.IMAGE_TTL)
+    return image
+
+
+class ThumbnailSignals(QObject):
+    loaded = Signal(object, QImage)  # (anime_id, downscaled cover)
+    failed = Signal(object, str)
+
+
+class ThumbnailWorker(QRunnable):
+    """Load one thumbnail on the thread pool"""
+
+    def __init__(self, anime_id):
+        super().__init__()
+        self.anime_id = anime_id
+        self.signals = ThumbnailSignals()
+
+    def run(self):
+        import requests
+        try:
+            image = load_thumbnail(self.anime_id)
+        except requests.RequestException as e:
+            self.signals.failed.emit(self.anime_id, str(e))
+        else:
+            self.signals.loaded.emit(self.anime_id, image)
+
+
+class ThumbnailLoader(QObject):
+    """Background thumbnail loading with a bounded LRU cache of ready-to-show pixmaps.
+
+    request() answers from memory when it can and otherwise starts a worker;
+    ready is emitted on the GUI thread either way. Each anime is loaded at most
+    once at a time, so a prefetch and a selection of the same result share one
+    download.
+    """
+
+    ready = Signal(object, QPixmap)     # (anime_id, pixmap), pixmap is null when there is no cover
+    failed = Signal(object, str)
+
+    def __init__(self, parent=None, max_items=PIXMAP_CACHE_SIZE):
+        super().__init__(parent)
+        self.max_items = max_items
+        self._pixmaps = OrderedDict()   # anime_id -> QPixmap, least recently used first
+        self._loading = set()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(LOADER_THREADS)
+
+    def cached(self, anime_id):
+        """Return the pixmap for anime_id if it is in memory, else None"""
+        pixmap = self._pixmaps.get(anime_id)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(anime_id)
+        return pixmap
+
+    def request(self, anime_id):
+        pixmap = self.cached(anime_id)
+        if pixmap is not None:
+            self.ready.emit(anime_id, pixmap)
+        elif anime_id not in self._loading:
+            self._loading.add(anime_id)
+            worker = ThumbnailWorker(anime_id)
+            worker.signals.loaded.connect(self._on_loaded)
+            worker.signals.failed.connect(self._on_failed)
+            self._pool.start(worker)
+
+    def prefetch(self, anime_ids):
+        """Start loading thumbnails that are likely to be shown next"""
+        for anime_id in anime_ids[:PREFETCH_COUNT]:
+            if anime_id not in self._pixmaps and anime_id not in self._loading:
+                self.request(anime_id)
+
+    def _on_loaded(self, anime_id, image):
+        self._loading.discard(anime_id)
+        pixmap = QPixmap.fromImage(image)  # QPixmap may only be created on the GUI thread
+        self._pixmaps[anime_id] = pixmap
+        self._pixmaps.move_to_end(anime_id)
+        while len(self._pixmaps) > self.max_items:
+            self._pixmaps.popitem(last=False)
+        self.ready.emit(anime_id, pixmap)
+
+    def _on_failed(self, anime_id, error):
+        self._loading.discard(anime_id)
+        self.failed.emit(anime_id, error)
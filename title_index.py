@@ -0,0 +1,152 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+from episode_number import NOISE_PATTERN
+
+TitleCandidate = namedtuple("TitleCandidate", ["anime_id", "title", "score"])
+
+MATCH_THRESHOLD = 0.85  # Best candidate must score at least this to be used without searching MAL
+MATCH_MARGIN = 0.1      # ... and beat the runner-up (a different anime) by this much
+MISMATCH_PENALTY = 0.5  # Applied when season or other numbers differ: "Show S2" is not "Show"
+
+TAG_PATTERN = re.compile(r'[\[\(\{][^\]\)\}]*[\]\)\}]')    # [SubsPlease], (1080p), (2011)
+SEASON_PATTERNS = [
+    re.compile(r'\bseason\s*(\d{1,2})\b'),
+    re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)\s+season\b'),
+    re.compile(r'\bs(\d{1,2})\b'),
+]
+WORD_PATTERN = re.compile(r'[^a-z0-9]+')
+RELEASE_WORD_PATTERN = re.compile(
+    r'\b(?:blu ?ray|bd|bdrip|web ?dl|web ?rip|dual audio|multi ?subs?|batch|complete|uncensored|remux)\b')
+NUMBER_PATTERN = re.compile(r'\b\d+\b')
+
+
+def normalize_title(name):
+    """Return (comparable base title, season) for a folder name or MAL title.
+
+    Release tags, resolution/codec noise, accents, punctuation and case are
+    dropped, and season markers ("S2", "Season 2", "2nd Season") are pulled out
+    so that every spelling of a season compares equal. Season defaults to 1.
+    """
+    text = NOISE_PATTERN.sub(" ", TAG_PATTERN.sub(" ", name))
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = RELEASE_WORD_PATTERN.sub(" ", WORD_PATTERN.sub(" ", text.lower()))
+    season = 1
+    for pattern in SEASON_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            season = int(match.group(1))
+            text = text[:match.start()] + " " + text[match.end():]
+            break
+    return " ".join(text.split()), season
+
+
+def search_query(name):
+    """Turn a folder name into a MAL search query: "[Group] Show S2 (1080p)" -> "show 2nd season\""""
+    base, season = normalize_title(name)
+    if season == 1:
+        return base
+    suffix = "th" if 11 <= season % 100 <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(season % 10, "th")
+    return f"{base} {season}{suffix} season"
+
+
+def trigrams(base):
+    padded = f"  {base} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _score(shared, grams, other_grams, key, other_key):
+    """Dice coefficient of two trigram sets, penalized when seasons or numbers disagree"""
+    score = 2 * shared / (len(grams) + len(other_grams)) if grams or other_grams else 0.0
+    (base, season), (other_base, other_season) = key, other_key
+    if season != other_season:
+        score *= MISMATCH_PENALTY
+    if set(NUMBER_PATTERN.findall(base)) != set(NUMBER_PATTERN.findall(other_base)):
+        score *= MISMATCH_PENALTY
+    return score
+
+
+def similarity(name, title):
+    """Score in [0, 1] for how well title matches a folder or release name"""
+    key, other_key = normalize_title(name), normalize_title(title)
+    grams, other_grams = trigrams(key[0]), trigrams(other_key[0])
+    return _score(len(grams & other_grams), grams, other_grams, key, other_key)
+
+
+def is_confident(candidates):
+    """True if the top candidate is good enough to skip asking MAL"""
+    if not candidates or candidates[0].score < MATCH_THRESHOLD:
+        return False
+    return len(candidates) == 1 or candidates[0].score - candidates[1].score >= MATCH_MARGIN
+
+
+class TitleIndex:
+    """Trigram index of known MAL titles, for resolving folder names without a search request.
+
+    Titles are added as search results and details pages come in, and can be
+    bulk-loaded from a title dump. lookup() only scores entries that share at
+    least one trigram with the query, via an inverted index, so it stays fast
+    with tens of thousands of titles.
+    """
+
+    def __init__(self):
+        self._entries = []                  # (anime_id, title, normalized key, trigrams)
+        self._postings = defaultdict(list)  # trigram -> entry numbers
+        self._known = set()                 # (anime_id, normalized key) already indexed
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, anime_id, title):
+        key = normalize_title(title)
+        if not key[0]:
+            return
+        with self._lock:
+            if (anime_id, key) in self._known:
+                return
+            self._known.add((anime_id, key))
+            grams = trigrams(key[0])
+            number = len(self._entries)
+            self._entries.append((anime_id, title, key, grams))
+            for gram in grams:
+                self._postings[gram].append(number)
+
+    def load_dump(self, path):
+        """Add every title in a tab-separated dump: anime ID, title, then any alternative titles"""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#") or not line.strip():
+                    continue
+                anime_id, *titles = line.rstrip("\n").split("\t")
+                for title in titles:
+                    self.add(anime_id, title)
+
+    def lookup(self, name, limit=5):
+        """Return up to limit TitleCandidates for name, best first, one per anime"""
+        key = normalize_title(name)
+        grams = trigrams(key[0])
+        with self._lock:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._postings.get(gram, ()))
+            entries = [(self._entries[number], count) for number, count in shared.items()]
+
+        best = {}
+        for (anime_id, title, other_key, other_grams), count in entries:
+            score = _score(count, grams, other_grams, key, other_key)
+            if anime_id not in best or score > best[anime_id].score:
+                best[anime_id] = TitleCandidate(anime_id, title, score)
+        return sorted(best.values(), key=lambda candidate: -candidate.score)[:limit]
+
+    def best(self, name):
+        """Return the anime ID name confidently refers to, or None"""
+        candidates = self.lookup(name)
+        return candidates[0].anime_id if is_confident(candidates) else None
+
+
+def rank_results(name, results):
+    """Reorder [title, anime_id] pairs by how well each title matches name; ties keep MAL's order"""
+    return sorted(results, key=lambda result: -similarity(name, result[0]))